@@ -16,6 +16,8 @@
 
 """Invenio-SIP2 custom actions."""
 
+from functools import partial
+
 from flask import current_app
 
 from invenio_sip2.actions.base import Action
@@ -122,7 +124,7 @@ class AutomatedCirculationSystemStatus(Action):
             retries_allowed=str(acs_system.retries_allowed),
             date_time_sync=acs_system.sip2_current_date,
             protocol_version=acs_system.supported_protocol,
-            supported_messages=str(acs_system.supported_messages(client.remote_app)),
+            supported_messages=acs_system.supported_messages(client.remote_app),
             institution_id=client.institution_id,
         )
         # add variable field
@@ -158,11 +160,7 @@ class RequestResend(Action):
         :return: message class representing the response of the last action
             send tho the client
         """
-        last_response_message = client.last_response_message
-        request_msg = last_response_message.get("_sip2")
-        # strip the line terminator
-        request_msg = request_msg[: len(request_msg) - len(acs_system.line_terminator)]
-        return Message(request=request_msg)
+        return Message.loads(client.get("last_response"))
 
 
 class PatronEnable(Action):
@@ -180,19 +178,35 @@ class PatronEnable(Action):
         :return: message class representing the response of the current action
         """
         patron_id = message.get_field_value("patron_id")
-        is_valid_patron = validate_patron_handler(
-            client.remote_app,
-            patron_id,
-            institution_id=client.institution_id,
-            language=language,
-        )
-
-        enabled_patron = enable_patron_handler(
-            client.remote_app,
-            patron_id,
-            institution_id=client.institution_id,
-            language=language,
-        )
+        patron_password = message.get_field_value("patron_pwd")
+        # the handler calls are independent, run them concurrently
+        calls = [
+            partial(
+                validate_patron_handler,
+                client.remote_app,
+                patron_id,
+                institution_id=client.institution_id,
+                language=language,
+            ),
+            partial(
+                enable_patron_handler,
+                client.remote_app,
+                patron_id,
+                institution_id=client.institution_id,
+                language=language,
+            ),
+        ]
+        if patron_password:
+            calls.append(
+                partial(
+                    authorize_patron_handler,
+                    client.remote_app,
+                    patron_id,
+                    patron_password,
+                    institution_id=client.institution_id,
+                )
+            )
+        is_valid_patron, enabled_patron, *authenticated = self.run_concurrently(*calls)
         current_logger.debug(f"[PatronEnable]: handler response: {enabled_patron}")
         # prepare message based on required fields
         response_message = self.prepare_message_response(
@@ -208,18 +222,10 @@ class PatronEnable(Action):
         )
 
         # check patron password
-        patron_password = message.get_field_value("patron_pwd")
         if patron_password:
-            is_authenticated = authorize_patron_handler(
-                client.remote_app,
-                patron_id,
-                patron_password,
-                institution_id=client.institution_id,
-            )
-
             response_message.add_variable_field(
                 field_name="valid_patron_pwd",
-                field_value="Y" if is_authenticated else "N",
+                field_value="Y" if authenticated[0] else "N",
             )
 
         # add optional fields
@@ -282,12 +288,18 @@ class PatronInformation(Action):
         :return: message class representing the response of the current action
         """
         patron_id = message.get_field_value("patron_id")
-        patron_account = patron_handler(
-            client.remote_app,
-            patron_id,
-            institution_id=client.institution_id,
-            language=message.i18n_language,
-        )
+        # the account is cached during the patron session
+        patron_account = client.get_patron_account(patron_id, message.i18n_language)
+        if patron_account is None:
+            patron_account = patron_handler(
+                client.remote_app,
+                patron_id,
+                institution_id=client.institution_id,
+                language=message.i18n_language,
+            )
+            client.cache_patron_account(
+                patron_id, message.i18n_language, patron_account
+            )
         current_logger.debug(f"[PatronInformation]: handler response: {patron_account}")
         # TODO: better way to begin session
         # start patron session
@@ -327,6 +339,8 @@ class PatronInformation(Action):
         # check patron password
         patron_password = message.get_field_value("patron_pwd")
         if patron_password:
+            # the password is checked with the id of the account, which can
+            # differ from the identifier sent by the selfcheck
             is_authenticated = authorize_patron_handler(
                 client.remote_app,
                 patron_account.patron_id,
@@ -466,6 +480,9 @@ class Checkin(Action):
             )
 
         current_logger.debug(f"[Checkin]: handler response: {checkin}")
+        if checkin.is_success:
+            # the loans, fines and holds of the patron changed
+            client.invalidate_patron_account()
 
         # prepare message based on required fields
         response_message = self.prepare_message_response(
@@ -520,6 +537,9 @@ class Checkout(Action):
             current_app.logger.exception("checkout error")
 
         current_logger.debug(f"[Checkout]: handler response: {checkout}")
+        if checkout.is_success:
+            # the loans, fines and holds of the patron changed
+            client.invalidate_patron_account()
 
         # prepare message based on required fields
         response_message = self.prepare_message_response(
@@ -577,6 +597,9 @@ class FeePaid(Action):
             current_app.logger.exception("fee paid error")
 
         current_logger.debug(f"[Fee paid]: handler response: {fee_paid}")
+        if fee_paid.is_accepted:
+            # the fines of the patron changed
+            client.invalidate_patron_account()
 
         # prepare message based on required fields
         response_message = self.prepare_message_response(
@@ -629,6 +652,9 @@ class Hold(Action):
             )
 
         current_logger.debug(f"[Hold]: handler response: {hold}")
+        if hold.is_success:
+            # the holds of the patron changed
+            client.invalidate_patron_account()
 
         # prepare message based on required fields
         response_message = self.prepare_message_response(
@@ -683,6 +709,9 @@ class Renew(Action):
             )
 
         current_logger.debug(f"[Renew]: handler response: {renew}")
+        if renew.is_success:
+            # the due dates and overdue items of the patron changed
+            client.invalidate_patron_account()
 
         # prepare message based on required fields
         response_message = self.prepare_message_response(
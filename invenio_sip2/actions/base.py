@@ -61,6 +61,31 @@ class Action:
         """Execute actions."""
         raise NotImplementedError
 
+    @staticmethod
+    def run_concurrently(*calls):
+        """Run independent handler calls concurrently.
+
+        The calls are run by the handlers thread pool, so that the action
+        waits for the slowest remote call instead of for all of them in turn.
+
+        :param calls: callables without arguments, e.g. `functools.partial`
+            of the handlers
+        :return: list of the results of the calls, in the same order
+        """
+        executor = acs_system.handlers_executor
+        if executor is None or len(calls) < 2:
+            return [call() for call in calls]
+        app = acs_system.app
+
+        def run(call):
+            with app.app_context():
+                return call()
+
+        # run the first call in the current thread while the others run in
+        # the pool
+        futures = [executor.submit(run, call) for call in calls[1:]]
+        return [calls[0](), *(future.result() for future in futures)]
+
     def __str__(self):
         """String representation of Action class."""
         return (
@@ -16,6 +16,9 @@
 
 """Invenio-SIP2 API."""
 
+import base64
+import zlib
+from datetime import datetime, timezone
 from functools import wraps
 
 from flask import current_app
@@ -27,6 +30,25 @@ from invenio_sip2.models import SelfcheckLanguage
 from invenio_sip2.proxies import current_sip2 as acs_system
 from invenio_sip2.utils import generate_checksum
 
+# variable fields never dumped or journaled
+PRIVATE_FIELDS = ("login_uid", "login_pwd", "patron_pwd")
+
+# variable fields with personal data of the patrons, never journaled
+PERSONAL_FIELDS = (
+    "patron_name",
+    "home_address",
+    "email",
+    "home_phone",
+    "hold_items",
+    "overdue_items",
+    "charged_items",
+    "fine_items",
+    "recall_items",
+    "unavailable_hold_items",
+    "renewed_items",
+    "unrenewed_items",
+)
+
 
 def preprocess_field_value(func):
     """Decorator to preprocess field value."""
@@ -262,11 +284,7 @@ class Message:
             data[fixed_field.field.field_id] = fixed_field.field_value
 
         for variable_field in self.variable_fields:
-            if variable_field.field.name not in [
-                "login_uid",
-                "login_pwd",
-                "patron_pwd",
-            ]:
+            if variable_field.field.name not in PRIVATE_FIELDS:
                 if variable_field.field.is_multiple:
                     field_list = data.get(variable_field.field.name, [])
                     field_list.append(variable_field.field_value)
@@ -278,3 +296,55 @@ class Message:
         if self.checksum:
             data["checksum"] = self.checksum
         return data
+
+    def dumps_raw(self, compress=False):
+        """Dumps message as its wire string and a few indexed fields.
+
+        Much smaller than `dumps`, the decoded fields are rebuilt from the
+        wire string with `loads`.
+
+        :param compress: store the wire string compressed with zlib
+        :return: dict with the wire string, command, sequence number and date
+        """
+        data = {
+            "command": self.command,
+            "date": datetime.now(timezone.utc).isoformat(),
+        }
+        if self.sequence_number:
+            data["sequence_number"] = self.sequence_number
+        text = str(self)
+        if compress:
+            data["_sip2_zlib"] = base64.b64encode(zlib.compress(text.encode())).decode()
+        else:
+            data["_sip2"] = text
+        return data
+
+    def masked_text(self):
+        """Get the wire string with the private and personal fields masked."""
+        text = str(self)
+        for variable_field in self.variable_fields:
+            if variable_field.field.name in PRIVATE_FIELDS + PERSONAL_FIELDS:
+                field_id = variable_field.field.field_id
+                text = text.replace(
+                    f"{field_id}{variable_field.field_value}|", f"{field_id}***|"
+                )
+        return text
+
+    @classmethod
+    def loads(cls, data):
+        """Load a message dumped by `dumps` or `dumps_raw`.
+
+        :param data: the dumped message
+        :return: the message or `None` if there is no dumped message
+        """
+        data = data or {}
+        if "_sip2_zlib" in data:
+            text = zlib.decompress(base64.b64decode(data["_sip2_zlib"])).decode()
+        else:
+            text = data.get("_sip2")
+        if not text:
+            return None
+        if text.endswith(acs_system.line_terminator):
+            # strip the line terminator
+            text = text[: len(text) - len(acs_system.line_terminator)]
+        return cls(request=text)
@@ -24,7 +24,8 @@ import psutil
 from flask.cli import with_appcontext
 from psutil import NoSuchProcess
 
-from invenio_sip2.records import Server
+from invenio_sip2.proxies import current_datastore
+from invenio_sip2.records import Client, Server
 from invenio_sip2.server import SocketServer
 
 
@@ -36,6 +37,14 @@ def selfcheck():
 # TODO: create CLI to manage database
 
 
+@selfcheck.command("reindex")
+@with_appcontext
+def reindex():
+    """Rebuild the datastore indexes of servers and clients."""
+    count = current_datastore.reindex([Server, Client])
+    click.echo(f"{count} records reindexed")
+
+
 @selfcheck.command("start")
 @click.argument("name")
 @click.option(
@@ -85,6 +94,10 @@ def stop_server(name, delete):
                 p.terminate()
             except NoSuchProcess:
                 server.down()
+        elif server.get("status") == "running":
+            # the lease expired, the server process crashed
+            server.down()
+            click.echo(f"{name} marked as stopped")
         else:
             click.echo("server already stopped")
 
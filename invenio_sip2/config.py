@@ -19,12 +19,35 @@
 
 ================================ ==============================================
 `SIP2_DATASTORE_HANDLER`         datastore, default: `Sip2RedisDatastore`
+`SIP2_ASYNC_DATASTORE_HANDLER`   asynchronous datastore, default:
+                                 `Sip2AsyncRedisDatastore` for the redis
+                                 datastore
+`SIP2_DATASTORE_MEMORY_SNAPSHOT` Snapshot file of the in-memory datastore
 `SIP2_DATASTORE_REDIS_PREFIX`    Prefix for redis keys, default `sip2`
 `SIP2_DATASTORE_REDIS_URL`       Redis Datastore URL
+`SIP2_DATASTORE_REDIS_SENTINELS` Addresses of the Redis Sentinels, see below
+`SIP2_DATASTORE_REDIS_CLUSTER`   Connect to a Redis Cluster, default: `False`
+`SIP2_DATASTORE_REDIS_RETRIES`   Number of retries of failing Redis commands,
+                                 default: `3`
+`SIP2_DATASTORE_SERIALIZER`      Serializer of the datastore records, default:
+                                 `JSONSerializer`
+`SIP2_DATASTORE_SQLITE_PATH`     Database file of the SQLite datastore
+`SIP2_DATASTORE_JOURNAL_MAXLEN`  Number of transactions kept in the journal,
+                                 default: `0` (disabled)
+`SIP2_DATASTORE_RECORD_TTL`      Time to live, in seconds, of the records of
+                                 running servers, default: `300`
+`SIP2_DATASTORE_LEASE_TTL`       Time, in seconds, a running server holds its
+                                 lease, default: `90`
+`SIP2_DATASTORE_SERVER_CACHE_TTL` Time, in seconds, servers are cached in
+                                 memory, default: `60`
 
 `SIP2_MESSAGE_ACTIONS`           Dictionary of all selfcheck actions.
 `SIP2_REMOTE_ACTION_HANDLERS`    Dictionary of remote action handlers.
                                  See example below.
+`SIP2_HANDLERS_MAX_WORKERS`      Number of remote handler calls of an action
+                                 run concurrently, default: `4`
+`SIP2_PATRON_ACCOUNT_CACHE_TTL`  Time, in seconds, the account of the patron
+                                 of a session is cached, default: `60`
 `SIP2_MESSAGE_TYPES`             Define all message types conforming to SIP2
                                  protocol.
 `SIP2_FIXED_FIELD_DEFINITION`    All fixed field available.
@@ -36,8 +59,27 @@ Datastore handlers
 
 Use `SIP2_DATASTORE_HANDLER` to define your custom datastore.
 
-Provided datastore by invenio-sip2 is:
+Provided datastores by invenio-sip2 are:
   :class: `invenio_sip2.datastore:Sip2RedisDatastore`
+  :class: `invenio_sip2.datastore:Sip2SQLiteDatastore` (single host only)
+  :class: `invenio_sip2.datastore:InMemoryDatastore` (single process only)
+
+The Redis datastores connect to a single Redis server by default. For
+failover, set `SIP2_DATASTORE_REDIS_SENTINELS` to connect to the master
+monitored by Redis Sentinel. To shard the records, set
+`SIP2_DATASTORE_REDIS_CLUSTER` to connect to a Redis Cluster.
+
+.. code-block:: python
+
+    SIP2_DATASTORE_REDIS_SENTINELS = [("sentinel-1", 26379), ("sentinel-2", 26379)]
+    SIP2_DATASTORE_REDIS_SENTINEL_SERVICE = "sip2"
+
+Use `SIP2_DATASTORE_SERIALIZER` to define how the records are encoded.
+
+Provided serializers by invenio-sip2 are:
+  :class: `invenio_sip2.datastore:JSONSerializer`
+  :class: `invenio_sip2.datastore:MsgpackSerializer` (requires the `msgpack`
+  extra: `pip install invenio-sip2[msgpack]`)
 
 Remote action handlers
 ^^^^^^^^^^^^^^^^^^^^^^
@@ -151,9 +193,106 @@ SIP2_DEFAULT_LANGUAGE = BABEL_DEFAULT_LANGUAGE
 # DATASTORE
 # =========
 SIP2_DATASTORE_HANDLER = "invenio_sip2.datastore:Sip2RedisDatastore"
+
+#: Asynchronous datastore, must use the same storage as the datastore.
+#: `None` uses the asynchronous datastore of the redis datastore, the other
+#: datastores have none.
+SIP2_ASYNC_DATASTORE_HANDLER = None
+
+#: Prefix of the redis keys, so that the redis database can be shared, e.g.
+#: with the Invenio caches. Set to an empty string to use unprefixed keys.
 SIP2_DATASTORE_REDIS_PREFIX = "sip2"
+
 SIP2_DATASTORE_REDIS_URL = "redis://localhost:16379/0"
 
+#: Addresses, as (host, port) pairs, of the Redis Sentinels monitoring the
+#: datastore. If set, the datastore connects to the current master and the
+#: URL only gives the database and the credentials.
+SIP2_DATASTORE_REDIS_SENTINELS = None
+
+#: Name of the master monitored by the Redis Sentinels
+SIP2_DATASTORE_REDIS_SENTINEL_SERVICE = "sip2"
+
+#: Connect to the Redis Cluster of `SIP2_DATASTORE_REDIS_URL`. The keys of a
+#: server and of its clients share a hash tag to be stored in the same slot.
+SIP2_DATASTORE_REDIS_CLUSTER = False
+
+#: Maximum number of connections of the Redis connection pool
+SIP2_DATASTORE_REDIS_MAX_CONNECTIONS = 50
+
+#: Timeout, in seconds, of Redis commands
+SIP2_DATASTORE_REDIS_SOCKET_TIMEOUT = 5
+
+#: Timeout, in seconds, to connect to Redis
+SIP2_DATASTORE_REDIS_CONNECT_TIMEOUT = 5
+
+#: Interval, in seconds, after which an idle Redis connection is checked
+#: before being used
+SIP2_DATASTORE_REDIS_HEALTH_CHECK_INTERVAL = 30
+
+#: Number of retries of a Redis command failing on a connection error or a
+#: timeout
+SIP2_DATASTORE_REDIS_RETRIES = 3
+
+#: Base and maximum delay, in seconds, of the jittered exponential backoff
+#: between retries
+SIP2_DATASTORE_REDIS_RETRY_BACKOFF = (0.05, 1)
+
+#: File used to persist the records of the in-memory datastore between
+#: restarts. `None` keeps the records in memory only.
+SIP2_DATASTORE_MEMORY_SNAPSHOT = None
+
+#: Database file of the SQLite datastore. `None` uses `sip2-datastore.db` in
+#: the application instance folder.
+SIP2_DATASTORE_SQLITE_PATH = None
+
+#: Size, in bytes, of the memory-mapped part of the SQLite database
+SIP2_DATASTORE_SQLITE_MMAP_SIZE = 64 * 1024 * 1024
+
+#: Serializer of the datastore records
+SIP2_DATASTORE_SERIALIZER = "invenio_sip2.datastore:JSONSerializer"
+
+#: Buffer client updates and write them in batch from the server loop
+SIP2_DATASTORE_WRITE_BEHIND = True
+
+#: Maximum delay, in seconds, before buffered client updates are written
+SIP2_DATASTORE_WRITE_BEHIND_DELAY = 0.05
+
+#: Compress the last request and response messages stored in the client
+#: records
+SIP2_DATASTORE_COMPRESS_MESSAGES = False
+
+#: Maximum number of transactions kept in the transaction journal. `0`
+#: disables the journal. The passwords and the personal data of the patrons
+#: are masked in the journaled messages.
+SIP2_DATASTORE_JOURNAL_MAXLEN = 0
+
+#: Maximum delay, in seconds, before transactions are appended to the journal
+SIP2_DATASTORE_JOURNAL_DELAY = 1
+
+#: Time, in seconds, server records are cached in memory. `0` disables the
+#: cache. Servers are never cached with the SQLite datastore, as its changes
+#: aren't notified to the other processes.
+SIP2_DATASTORE_SERVER_CACHE_TTL = 60
+
+#: Pub/sub channel used to notify the processes of changed records
+SIP2_DATASTORE_INVALIDATION_CHANNEL = "sip2:invalidation"
+
+#: Time to live, in seconds, of the clients and running servers records.
+#: Records of a server process killed without closing are removed once it
+#: elapsed. `None` disables the expiry.
+SIP2_DATASTORE_RECORD_TTL = 300
+
+#: Time, in seconds, a running server holds its lease. A server whose
+#: process stopped without releasing the lease is reported as stale and can
+#: be restarted, on any host, once it elapsed. `None` disables the leases.
+SIP2_DATASTORE_LEASE_TTL = 90
+
+#: Interval, in seconds, at which a server refreshes the expiry of its
+#: records and renews its lease. Must be lower than
+#: `SIP2_DATASTORE_RECORD_TTL` and `SIP2_DATASTORE_LEASE_TTL`.
+SIP2_DATASTORE_HEARTBEAT_INTERVAL = 30
+
 # LOGGING
 # =======
 
@@ -193,6 +332,15 @@ SIP2_PERMISSIONS_FACTORY = default_permission_factory
 SIP2_REMOTE_ACTION_HANDLERS = {}
 """Configuration of remote handlers."""
 
+SIP2_HANDLERS_MAX_WORKERS = 4
+"""Maximum number of independent remote handler calls of an action run
+concurrently. `1` runs them one after another."""
+
+SIP2_PATRON_ACCOUNT_CACHE_TTL = 60
+"""Time, in seconds, the account of the patron of a session is cached by the
+server process. The account is refreshed after a checkout, a checkin, a
+renewal, a hold or a fee payment. `0` disables the cache."""
+
 SIP2_TEXT_ENCODING = "UTF-8"
 """Message text charset encoding."""
 
@@ -0,0 +1,44 @@
+#
+# INVENIO-SIP2
+# Copyright (C) 2020 UCLouvain
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""SIP2 socket server datastore."""
+
+from invenio_sip2.datastore.base import AsyncDatastore, Datastore
+from invenio_sip2.datastore.cache import RecordCache
+from invenio_sip2.datastore.memory import InMemoryDatastore
+from invenio_sip2.datastore.redis import Sip2RedisDatastore
+from invenio_sip2.datastore.redis_async import Sip2AsyncRedisDatastore
+from invenio_sip2.datastore.serializers import (
+    JSONPickleSerializer,
+    JSONSerializer,
+    MsgpackSerializer,
+    Serializer,
+)
+from invenio_sip2.datastore.sqlite import Sip2SQLiteDatastore
+
+__all__ = (
+    "AsyncDatastore",
+    "Datastore",
+    "InMemoryDatastore",
+    "JSONPickleSerializer",
+    "JSONSerializer",
+    "MsgpackSerializer",
+    "RecordCache",
+    "Serializer",
+    "Sip2AsyncRedisDatastore",
+    "Sip2RedisDatastore",
+    "Sip2SQLiteDatastore",
+)
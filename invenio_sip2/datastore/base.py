@@ -0,0 +1,345 @@
+#
+# INVENIO-SIP2
+# Copyright (C) 2020 UCLouvain
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""SIP2 socket server datastore interface."""
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+
+@contextmanager
+def keep_changes_on_error(records):
+    """Keep the changes of the records if writing them fails.
+
+    The changes popped while the records are written are tracked again, so
+    that the next update writes them.
+
+    :param records: the records written
+    """
+    states = [(record.peek_changes(), record.stored_indexes) for record in records]
+    try:
+        yield
+    except Exception:
+        for record, (changes, stored_indexes) in zip(records, states, strict=True):
+            record.restore_changes(changes)
+            record.stored_indexes = stored_indexes
+        raise
+
+
+class Datastore(ABC):
+    """Abstract datastore class.
+
+    The objects of a datastore are `cacheable` in the memory of a process if
+    all the processes using the datastore are notified of its changes.
+    """
+
+    cacheable = True
+
+    def __init__(self, app=None, **kwargs):
+        """Initialize the datastore."""
+        self._subscribers = []
+
+    def hash_tag(self, value):
+        """Get the part of a key selecting where the object is stored.
+
+        Sharded datastores should override this method, so that keys
+        sharing this part are stored on the same shard.
+
+        :param value: the key part
+        :return: the key part
+        """
+        return str(value)
+
+    @abstractmethod
+    def get(self, id_):
+        """Retrieve object for given id.
+
+        :param id_: the object's id
+        :return: the stored object
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_many(self, keys):
+        """Retrieve objects for given keys.
+
+        :param keys: the objects' keys
+        :return: list of stored objects, `None` for missing keys
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def add(self, key, value):
+        """Store the object.
+
+        :param key: the object's key
+        :param value: the stored object
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def update(self, key, value):
+        """Store the object.
+
+        :param key: the object's key
+        :param value: the stored object
+        """
+        raise NotImplementedError
+
+    def update_many(self, records):
+        """Store the objects.
+
+        Datastores able to batch writes should override this method.
+
+        :param records: the objects
+        """
+        for record in records:
+            self.update(record)
+
+    def touch(self, records):
+        """Refresh the expiry of the stored objects.
+
+        Datastores supporting expiring objects should override this method.
+
+        :param records: the objects
+        """
+        return
+
+    @abstractmethod
+    def delete(self, key):
+        """Delete the specific key."""
+        raise NotImplementedError
+
+    def delete_many(self, records):
+        """Delete the objects.
+
+        Datastores able to batch deletions should override this method.
+
+        :param records: the objects
+        """
+        for record in records:
+            self.delete(record)
+
+    def subscribe(self, callback):
+        """Register a callback notified when stored objects change.
+
+        :param callback: function called with the keys of the changed objects,
+            `*` meaning that all objects changed
+        """
+        self._subscribers.append(callback)
+
+    def publish(self, *keys):
+        """Notify the subscribers that the given objects changed.
+
+        Datastores shared between processes should also notify the
+        subscribers of the other processes.
+
+        :param keys: the objects' keys
+        """
+        for callback in self._subscribers:
+            callback(keys)
+
+    @abstractmethod
+    def flush(self):
+        """Flush the datastore."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def all(self):
+        """Return all stored object in the datastore."""
+        raise NotImplementedError
+
+    def count(self, record_type=None, filter_query=None):
+        """Return the number of objects in the datastore.
+
+        Datastores able to count without reading the objects should override
+        this method.
+
+        :param record_type: the object's type
+        :param filter_query: index to count, formatted as `<name>:<value>`
+        :return: number of stored objects
+        """
+        if filter_query:
+            return len(self.search(index_type=record_type, filter_query=filter_query))
+        return len(list(self.all(record_type)))
+
+    @abstractmethod
+    def search(self, query):
+        """Return all objects in the datastore corresponding to the query."""
+        raise NotImplementedError
+
+    def append_journal(self, entries, maxlen):
+        """Append transactions to the journal.
+
+        Datastores supporting the transaction journal should override this
+        method.
+
+        :param entries: dictionaries of string values
+        :param maxlen: maximum number of transactions kept in the journal
+        """
+        return
+
+    def read_journal(self, after=None, count=100):
+        """Read transactions from the journal, oldest first.
+
+        :param after: id of the last transaction read, `None` to read from
+            the oldest transaction
+        :param count: maximum number of transactions read
+        :return: list of (transaction id, transaction) tuples
+        """
+        return []
+
+    def acquire_lease(self, name, owner, ttl):
+        """Acquire or renew a lease, unless another owner holds it.
+
+        Datastores shared between processes should override this method to
+        acquire the lease atomically.
+
+        :param name: the lease's name
+        :param owner: the lease's owner
+        :param ttl: time, in seconds, before the lease expires
+        :return: `True` if the owner holds the lease
+        """
+        return True
+
+    def release_lease(self, name, owner):
+        """Release a lease held by the given owner.
+
+        :param name: the lease's name
+        :param owner: the lease's owner
+        """
+        return
+
+
+class AsyncDatastore(ABC):
+    """Abstract asynchronous datastore class.
+
+    Asynchronous counterpart of `Datastore`, for servers running on an
+    event loop. It must share its storage with the synchronous datastore.
+    """
+
+    @abstractmethod
+    async def get(self, id_, record_type=None):
+        """Retrieve object for given id.
+
+        :param id_: the object's id
+        :param record_type: the object's type
+        :return: the stored object
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_many(self, keys):
+        """Retrieve objects for given keys.
+
+        :param keys: the objects' keys
+        :return: list of stored objects, `None` for missing keys
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add(self, record, id_=None, **kwargs):
+        """Store the object.
+
+        :param record: the object
+        :param id_: the object's id
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update(self, record, **kwargs):
+        """Store the object.
+
+        :param record: the object
+        """
+        raise NotImplementedError
+
+    async def update_many(self, records):
+        """Store the objects.
+
+        :param records: the objects
+        """
+        for record in records:
+            await self.update(record)
+
+    @abstractmethod
+    async def delete(self, record, record_type=None):
+        """Delete the object.
+
+        :param record: the object
+        """
+        raise NotImplementedError
+
+    async def delete_many(self, records):
+        """Delete the objects.
+
+        :param records: the objects
+        """
+        for record in records:
+            await self.delete(record)
+
+    @abstractmethod
+    async def all(self, record_type=None):
+        """Return all stored object in the datastore.
+
+        :param record_type: the object's type
+        :return: list of stored objects
+        """
+        raise NotImplementedError
+
+    async def touch(self, records):
+        """Refresh the expiry of the stored objects.
+
+        :param records: the objects
+        """
+        return
+
+    async def publish(self, *keys):
+        """Notify the subscribers of the other processes that objects changed.
+
+        The subscribers are registered on the synchronous datastore.
+
+        :param keys: the objects' keys
+        """
+        return
+
+    async def release_lease(self, name, owner):
+        """Release a lease held by the given owner.
+
+        :param name: the lease's name
+        :param owner: the lease's owner
+        """
+        return
+
+    async def count(self, record_type=None, filter_query=None):
+        """Return the number of objects in the datastore.
+
+        :param record_type: the object's type
+        :param filter_query: index to count, formatted as `<name>:<value>`
+        :return: number of stored objects
+        """
+        if filter_query:
+            objects = await self.search(
+                index_type=record_type, filter_query=filter_query
+            )
+        else:
+            objects = await self.all(record_type)
+        return len(objects)
+
+    @abstractmethod
+    async def search(self, search_term="*", index_type="*", filter_query=None):
+        """Return all objects in the datastore corresponding to the query."""
+        raise NotImplementedError
@@ -0,0 +1,104 @@
+#
+# INVENIO-SIP2
+# Copyright (C) 2026 UCLouvain
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Process-local cache in front of the SIP2 datastore."""
+
+from threading import Lock
+from time import monotonic
+
+
+class RecordCache:
+    """Read-through cache of datastore values.
+
+    Values are kept in memory for `ttl` seconds at most. Entries are dropped
+    as soon as the datastore notifies that the corresponding objects changed,
+    including changes made by other processes sharing the datastore.
+    """
+
+    def __init__(self, datastore, ttl=60):
+        """Constructor.
+
+        :param datastore: the datastore notifying the changes
+        :param ttl: time, in seconds, a value is kept. `0` disables the cache.
+        """
+        self.datastore = datastore
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = Lock()
+        self._subscribed = False
+
+    def __len__(self):
+        """Number of cached values."""
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """Check if a value is cached for the key."""
+        return key in self._entries
+
+    def get(self, key, loader):
+        """Get the cached value or load it.
+
+        :param key: the cache key
+        :param loader: function returning the value from the datastore
+        :return: the value, `None` values are not cached
+        """
+        if not self.ttl:
+            return loader()
+        if not self._subscribed:
+            self._subscribed = True
+            self.datastore.subscribe(self._on_change)
+
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] > monotonic():
+            return entry[1]
+
+        value = loader()
+        if value is not None:
+            with self._lock:
+                self._entries[key] = (monotonic() + self.ttl, value)
+        return value
+
+    def invalidate(self, *keys):
+        """Drop the given keys from the caches of all processes.
+
+        :param keys: the cache keys
+        """
+        self.datastore.publish(*keys)
+
+    async def ainvalidate(self, async_datastore, *keys):
+        """Drop the given keys from the caches of all processes asynchronously.
+
+        :param async_datastore: the asynchronous datastore notifying the
+            other processes
+        :param keys: the cache keys
+        """
+        self._on_change(keys)
+        await async_datastore.publish(*keys)
+
+    def clear(self):
+        """Drop all cached values of this process."""
+        with self._lock:
+            self._entries.clear()
+
+    def _on_change(self, keys):
+        """Drop the values of the changed objects."""
+        if "*" in keys:
+            self.clear()
+            return
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
@@ -0,0 +1,328 @@
+#
+# INVENIO-SIP2
+# Copyright (C) 2026 UCLouvain
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""In-memory datastore for SIP2 socket server."""
+
+import atexit
+import json
+from collections import deque
+from copy import deepcopy
+from fnmatch import fnmatch
+from pathlib import Path
+from threading import RLock
+from time import monotonic
+
+from flask import current_app
+
+from invenio_sip2.datastore.base import Datastore
+
+
+class InMemoryDatastore(Datastore):
+    """In-memory datastore for sip2.
+
+    Records are kept in the memory of the process, so this datastore can only
+    be used by single-process deployments and tests, where the changes are
+    notified to all the caches. It maintains the same
+    indexes as the Redis datastore:
+
+    - ``index:<record_type>``: mapping of record id to record key.
+    - ``index:<record_type>:<name>:<value>``: set of record keys for each
+      index returned by ``record.get_indexes()``.
+
+    If `SIP2_DATASTORE_MEMORY_SNAPSHOT` is set, the records are loaded from
+    this file on startup and written back to it on exit.
+    """
+
+    def __init__(self, app=None, **kwargs):
+        """Initialize the datastore."""
+        super().__init__(app, **kwargs)
+        app = app or current_app
+        snapshot_path = app.config["SIP2_DATASTORE_MEMORY_SNAPSHOT"]
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self._lock = RLock()
+        self._records = {}
+        self._indexes = {}
+        self._journal = deque()
+        self._journal_id = 0
+        self._leases = {}
+        if self.snapshot_path:
+            self.load_snapshot()
+            atexit.register(self.snapshot)
+
+    @staticmethod
+    def _index_key(record_type, name=None, value=None):
+        """Get the index key for the given record type and index."""
+        if name is None:
+            return f"index:{record_type}"
+        return f"index:{record_type}:{name}:{value}"
+
+    def _add_indexes(self, record, indexes):
+        """Add record key to the given indexes."""
+        key = record.get_key()
+        ids = self._indexes.setdefault(self._index_key(record.record_type), {})
+        ids[record.id] = key
+        for name, value in indexes.items():
+            index_key = self._index_key(record.record_type, name, value)
+            self._indexes.setdefault(index_key, set()).add(key)
+
+    def _remove_indexes(self, record, indexes):
+        """Remove record key from the given indexes."""
+        key = record.get_key()
+        for name, value in indexes.items():
+            index_key = self._index_key(record.record_type, name, value)
+            keys = self._indexes.get(index_key, set())
+            keys.discard(key)
+            if not keys:
+                self._indexes.pop(index_key, None)
+
+    def get(self, id_, record_type=None):
+        """Retrieve object for given id.
+
+        :param id_: the object's id, or the object's key if no record type
+            is given
+        :param record_type: the object's type
+        :return: the stored object
+        """
+        with self._lock:
+            key = id_
+            if record_type:
+                key = self._indexes.get(self._index_key(record_type), {}).get(id_)
+            return deepcopy(self._records.get(key))
+
+    def get_many(self, keys):
+        """Retrieve objects for given keys.
+
+        :param keys: the objects' keys
+        :return: list of stored objects, `None` for missing keys
+        """
+        with self._lock:
+            return [deepcopy(self._records.get(key)) for key in keys]
+
+    def add(self, record, id_=None, **kwargs):
+        """Store the object.
+
+        :param record: the object
+        :param id_: the object's id
+        """
+        indexes = record.get_indexes()
+        record.pop_changes()
+        with self._lock:
+            self._records[record.get_key()] = deepcopy(record.dumps())
+            self._add_indexes(record, indexes)
+        record.stored_indexes = indexes
+
+    def update(self, record, **kwargs):
+        """Store the changed fields of the object.
+
+        :param record: the object
+        """
+        key = record.get_key()
+        indexes = record.get_indexes()
+        stale_indexes = {
+            name: value
+            for name, value in record.stored_indexes.items()
+            if indexes.get(name) != value
+        }
+        changed, removed = record.pop_changes()
+        with self._lock:
+            data = self._records.setdefault(key, {})
+            data.update({name: deepcopy(record[name]) for name in changed})
+            for name in removed:
+                data.pop(name, None)
+            self._remove_indexes(record, stale_indexes)
+            self._add_indexes(record, indexes)
+        record.stored_indexes = indexes
+
+    def delete(self, record, record_type=None):
+        """Delete the specific key.
+
+        :param record: the object
+        :param record_type: the object's type
+        """
+        self.delete_many([record])
+
+    def delete_many(self, records):
+        """Delete the objects.
+
+        :param records: the objects
+        """
+        with self._lock:
+            for record in records:
+                self._records.pop(record.get_key(), None)
+                self._indexes.get(self._index_key(record.record_type), {}).pop(
+                    record.id, None
+                )
+                self._remove_indexes(record, record.stored_indexes)
+                self._remove_indexes(record, record.get_indexes())
+
+    def flush(self):
+        """Flush the datastore."""
+        with self._lock:
+            self._records.clear()
+            self._indexes.clear()
+            self._journal.clear()
+            self._leases.clear()
+        self.publish("*")
+
+    def all(self, record_type=None):
+        """Return all object in datastore.
+
+        :param record_type: the object's type
+        :return: list of stored objects
+        """
+        with self._lock:
+            if record_type:
+                keys = self._indexes.get(self._index_key(record_type), {}).values()
+                values = self.get_many(keys)
+            else:
+                values = deepcopy(list(self._records.values()))
+        yield from (value for value in values if value is not None)
+
+    def count(self, record_type=None, filter_query=None):
+        """Return the number of objects in the datastore.
+
+        :param record_type: the object's type
+        :param filter_query: index to count, formatted as `<name>:<value>`
+        :return: number of stored objects
+        """
+        with self._lock:
+            if filter_query:
+                name, _, value = filter_query.partition(":")
+                index_key = self._index_key(record_type, name, value)
+                return len(self._indexes.get(index_key, ()))
+            if record_type:
+                return len(self._indexes.get(self._index_key(record_type), {}))
+            return len(self._records)
+
+    def search(self, search_term="*", index_type="*", filter_query=None):
+        """Search object in the datastore.
+
+        :param search_term: pattern matched against the object's id
+        :param index_type: the object's type
+        :param filter_query: index to search in, formatted as `<name>:<value>`
+        :return: list of stored objects
+        """
+        with self._lock:
+            if filter_query:
+                name, _, value = filter_query.partition(":")
+                keys = self._indexes.get(self._index_key(index_type, name, value), ())
+            else:
+                keys = self._indexes.get(self._index_key(index_type), {}).values()
+            if search_term != "*":
+                pattern = f"{index_type}:{search_term}*"
+                keys = [key for key in keys if fnmatch(key, pattern)]
+            return [value for value in self.get_many(keys) if value is not None]
+
+    def append_journal(self, entries, maxlen):
+        """Append transactions to the journal.
+
+        :param entries: dictionaries of string values
+        :param maxlen: maximum number of transactions kept in the journal
+        """
+        with self._lock:
+            for entry in entries:
+                self._journal_id += 1
+                self._journal.append((self._journal_id, dict(entry)))
+            while len(self._journal) > maxlen:
+                self._journal.popleft()
+
+    def read_journal(self, after=None, count=100):
+        """Read transactions from the journal, oldest first.
+
+        :param after: id of the last transaction read, `None` to read from
+            the oldest transaction
+        :param count: maximum number of transactions read
+        :return: list of (transaction id, transaction) tuples
+        """
+        with self._lock:
+            entries = [
+                (entry_id, dict(entry))
+                for entry_id, entry in self._journal
+                if after is None or entry_id > after
+            ]
+        return entries[:count]
+
+    def acquire_lease(self, name, owner, ttl):
+        """Acquire or renew a lease, unless another owner holds it.
+
+        :param name: the lease's name
+        :param owner: the lease's owner
+        :param ttl: time, in seconds, before the lease expires
+        :return: `True` if the owner holds the lease
+        """
+        now = monotonic()
+        with self._lock:
+            holder, expires = self._leases.get(name, (None, now))
+            if holder not in (None, owner) and expires > now:
+                return False
+            self._leases[name] = (owner, now + ttl)
+        return True
+
+    def release_lease(self, name, owner):
+        """Release a lease held by the given owner.
+
+        :param name: the lease's name
+        :param owner: the lease's owner
+        """
+        with self._lock:
+            if self._leases.get(name, (None,))[0] == owner:
+                del self._leases[name]
+
+    def reindex(self, record_classes):
+        """Rebuild the indexes from the stored objects.
+
+        :param record_classes: record classes to reindex
+        :return: number of reindexed objects
+        """
+        count = 0
+        with self._lock:
+            for record_class in record_classes:
+                pattern = f"{record_class.record_type}:*"
+                for key, data in list(self._records.items()):
+                    if not fnmatch(key, pattern) or "id" not in data:
+                        continue
+                    record = record_class(deepcopy(data))
+                    self._add_indexes(record, record.get_indexes())
+                    count += 1
+        return count
+
+    def snapshot(self):
+        """Write the stored objects and indexes to the snapshot file."""
+        with self._lock:
+            data = {
+                "records": self._records,
+                "indexes": {
+                    key: sorted(value) if isinstance(value, set) else value
+                    for key, value in self._indexes.items()
+                },
+            }
+            tmp_path = self.snapshot_path.with_name(f"{self.snapshot_path.name}.tmp")
+            with tmp_path.open("w", encoding="utf-8") as snapshot_file:
+                json.dump(data, snapshot_file, default=str)
+            tmp_path.replace(self.snapshot_path)
+
+    def load_snapshot(self):
+        """Load the stored objects and indexes from the snapshot file."""
+        if not self.snapshot_path.exists():
+            return
+        with self.snapshot_path.open(encoding="utf-8") as snapshot_file:
+            data = json.load(snapshot_file)
+        with self._lock:
+            self._records = data["records"]
+            self._indexes = {
+                key: set(value) if isinstance(value, list) else value
+                for key, value in data["indexes"].items()
+            }
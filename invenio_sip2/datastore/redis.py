@@ -0,0 +1,930 @@
+#
+# INVENIO-SIP2
+# Copyright (C) 2020 UCLouvain
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Redis datastore for SIP2 socket server."""
+
+import hashlib
+import json
+from fnmatch import fnmatch
+from time import sleep, time
+
+import redis
+from flask import current_app
+from invenio_base.utils import obj_or_import_string
+from redis.backoff import EqualJitterBackoff
+from redis.connection import parse_url
+from redis.exceptions import NoScriptError, ResponseError
+from redis.retry import Retry
+
+from invenio_sip2.datastore.base import Datastore, keep_changes_on_error
+from invenio_sip2.datastore.serializers import FORMAT_FIELD, get_serializer
+from invenio_sip2.proxies import current_logger as logger
+
+# stream of the transactions journal
+JOURNAL_KEY = "journal"
+
+# number of keys deleted per command when flushing a prefix
+FLUSH_BATCH_SIZE = 500
+
+# Write or delete a record and maintain its indexes atomically.
+# KEYS: record key, type index, type members index, record types set, index
+# keys to add the record to, then index keys to remove the record from.
+# ARGV: delete flag, replace flag, expiry (> 0 sets the time to live, < 0
+# removes it), record type, record id, index member of the record, number
+# of fields set, number of fields removed, number of index keys to add the
+# record to, index score of the record, the fields set as name and value
+# pairs, then the names of the fields removed.
+# Returns 0, without writing anything, if the record to update is missing,
+# e.g. expired, so that it is rewritten entirely.
+MUTATION_SCRIPT = """
+local unpack = table.unpack or unpack
+local key, type_index, type_members, member = KEYS[1], KEYS[2], KEYS[3], ARGV[6]
+local expire, score = tonumber(ARGV[3]), ARGV[10]
+local set, removed, added = tonumber(ARGV[7]), tonumber(ARGV[8]), tonumber(ARGV[9])
+if ARGV[1] == "1" then
+    redis.call("UNLINK", key)
+    redis.call("HDEL", type_index, ARGV[5])
+    redis.call("ZREM", type_members, member)
+else
+    if ARGV[2] == "1" then
+        redis.call("DEL", key)
+    elseif redis.call("EXISTS", key) == 0 then
+        return 0
+    end
+    if set > 0 then
+        redis.call("HSET", key, unpack(ARGV, 11, 10 + 2 * set))
+    end
+    if removed > 0 then
+        redis.call("HDEL", key, unpack(ARGV, 11 + 2 * set, 10 + 2 * set + removed))
+    end
+    if expire > 0 then
+        redis.call("EXPIRE", key, expire)
+    elseif expire < 0 then
+        redis.call("PERSIST", key)
+    end
+    redis.call("SADD", KEYS[4], ARGV[4])
+    redis.call("HSET", type_index, ARGV[5], member)
+    redis.call("ZADD", type_members, score, member)
+end
+for i = 5, 4 + added do
+    redis.call("ZADD", KEYS[i], score, member)
+end
+for i = 5 + added, #KEYS do
+    redis.call("ZREM", KEYS[i], member)
+end
+return 1
+"""
+MUTATION_SCRIPT_SHA = hashlib.sha1(
+    MUTATION_SCRIPT.encode(), usedforsecurity=False
+).hexdigest()
+
+# Acquire or renew the lease KEYS[1] for the owner ARGV[1] during ARGV[2]
+# milliseconds, unless another owner holds it.
+ACQUIRE_LEASE_SCRIPT = """
+local owner = redis.call("GET", KEYS[1])
+if owner and owner ~= ARGV[1] then
+    return 0
+end
+redis.call("SET", KEYS[1], ARGV[1], "PX", ARGV[2])
+return 1
+"""
+
+# Release the lease KEYS[1] if it is held by the owner ARGV[1].
+RELEASE_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class RedisLayout:
+    """Key layout and encoding of the records stored in Redis.
+
+    Shared by the synchronous and asynchronous Redis datastores. Helpers
+    taking a pipeline only queue commands, so they work with both clients.
+
+    On a Redis Cluster, the shard part of the keys is wrapped in a hash tag:
+    the id of a server for the server and its clients, the value for index
+    keys. A server, its clients and their index by server are thus stored
+    in the same slot.
+
+    Writes and deletions are described as mutations, applied by a Lua
+    script which writes the record and maintains its indexes atomically,
+    invoked by its SHA in a single round-trip. On a Redis Cluster, as a
+    script can't access keys of several slots, mutations are applied as
+    plain commands in non-transactional pipelines; index members left by
+    an interrupted pipeline are pruned when they are read.
+
+    Index members are scored by the expiry time of their record, `+inf` for
+    records which don't expire, so that the records are counted without
+    reading them nor counting the expired ones.
+    """
+
+    def init_layout(self, app):
+        """Initialize the layout options from the application config."""
+        self.serializer = obj_or_import_string(
+            app.config["SIP2_DATASTORE_SERIALIZER"]
+        )()
+        self.channel = app.config["SIP2_DATASTORE_INVALIDATION_CHANNEL"]
+        self.record_ttl = app.config["SIP2_DATASTORE_RECORD_TTL"]
+        self.hash_tags = app.config["SIP2_DATASTORE_REDIS_CLUSTER"]
+        self.transaction = not self.hash_tags
+        prefix = app.config["SIP2_DATASTORE_REDIS_PREFIX"]
+        self.prefix = f"{prefix}:" if prefix else ""
+
+    def connect(self, app, client_module=redis):
+        """Create the Redis client from the application config.
+
+        The client connects to the master of `SIP2_DATASTORE_REDIS_SENTINELS`
+        if set, to the Redis Cluster of `SIP2_DATASTORE_REDIS_URL` if
+        `SIP2_DATASTORE_REDIS_CLUSTER` is set, to `SIP2_DATASTORE_REDIS_URL`
+        otherwise.
+
+        :param app: the application
+        :param client_module: `redis` or `redis.asyncio`
+        :return: the Redis client
+        """
+        url = app.config["SIP2_DATASTORE_REDIS_URL"]
+        options = self.connection_options(app)
+        sentinels = app.config["SIP2_DATASTORE_REDIS_SENTINELS"]
+        if sentinels:
+            # the URL only gives the database and the credentials
+            url_options = parse_url(url)
+            sentinel = client_module.Sentinel(
+                [tuple(address) for address in sentinels],
+                sentinel_kwargs={
+                    "socket_timeout": options["socket_timeout"],
+                    "socket_connect_timeout": options["socket_connect_timeout"],
+                },
+            )
+            return sentinel.master_for(
+                app.config["SIP2_DATASTORE_REDIS_SENTINEL_SERVICE"],
+                redis_class=client_module.StrictRedis,
+                **{
+                    name: url_options[name]
+                    for name in ("db", "username", "password")
+                    if name in url_options
+                },
+                **options,
+            )
+        if self.hash_tags:
+            return client_module.RedisCluster.from_url(url, **options)
+        return client_module.StrictRedis.from_url(url, **options)
+
+    def hash_tag(self, value):
+        """Get a key part, wrapped in a hash tag on a Redis Cluster.
+
+        :param value: the key part
+        :return: the key part
+        """
+        return f"{{{value}}}" if self.hash_tags else str(value)
+
+    @staticmethod
+    def connection_options(app):
+        """Get the options of the Redis connection pool.
+
+        Commands failing on a connection error or a timeout, e.g. during a
+        failover, are retried with a jittered exponential backoff.
+
+        :param app: the application
+        :return: keyword arguments of the Redis client
+        """
+        base, cap = app.config["SIP2_DATASTORE_REDIS_RETRY_BACKOFF"]
+        return {
+            "max_connections": app.config["SIP2_DATASTORE_REDIS_MAX_CONNECTIONS"],
+            "socket_timeout": app.config["SIP2_DATASTORE_REDIS_SOCKET_TIMEOUT"],
+            "socket_connect_timeout": app.config[
+                "SIP2_DATASTORE_REDIS_CONNECT_TIMEOUT"
+            ],
+            "socket_keepalive": True,
+            "health_check_interval": app.config[
+                "SIP2_DATASTORE_REDIS_HEALTH_CHECK_INTERVAL"
+            ],
+            "retry": Retry(
+                EqualJitterBackoff(cap=cap, base=base),
+                app.config["SIP2_DATASTORE_REDIS_RETRIES"],
+            ),
+        }
+
+    def _key(self, key):
+        """Get the Redis key of a record key or of an internal key."""
+        if isinstance(key, bytes):
+            key = key.decode()
+        return f"{self.prefix}{key}"
+
+    def _index_key(self, record_type, name=None, value=None):
+        """Get the index key for the given record type and index."""
+        if name is None:
+            return self._key(f"index:{record_type}")
+        return self._key(f"index:{record_type}:{name}:{self.hash_tag(value)}")
+
+    def _members_key(self, record_type):
+        """Get the key of the index of all the objects of the given type."""
+        return self._key(f"index:{record_type}:members")
+
+    def _score(self, record):
+        """Get the index score of the object, the time its record expires."""
+        if self.record_ttl and record.expires:
+            return time() + self.record_ttl
+        return "+inf"
+
+    def _add_indexes(self, pipe, record, indexes):
+        """Add record key to the given indexes."""
+        key = record.get_key()
+        score = {key: self._score(record)}
+        pipe.sadd(self._key("record_types"), record.record_type)
+        pipe.hset(self._index_key(record.record_type), record.id, key)
+        pipe.zadd(self._members_key(record.record_type), score)
+        for name, value in indexes.items():
+            pipe.zadd(self._index_key(record.record_type, name, value), score)
+
+    @staticmethod
+    def _queue_count(pipe, index_keys):
+        """Add the count of the members of the indexes to the pipeline.
+
+        The members of expired objects are removed first.
+
+        :param index_keys: keys of the indexes
+        """
+        now = time()
+        for index_key in index_keys:
+            pipe.zremrangebyscore(index_key, "-inf", now)
+            pipe.zcard(index_key)
+
+    @staticmethod
+    def _count_result(results):
+        """Get the count from the results of the queued counts."""
+        return sum(results[1::2])
+
+    def _encode(self, data, with_format=False):
+        """Encode record fields to hash fields."""
+        fields = {name: self.serializer.dumps(value) for name, value in data.items()}
+        if with_format:
+            fields[FORMAT_FIELD] = self.serializer.format
+        return fields
+
+    @staticmethod
+    def _decode(fields):
+        """Decode hash fields to a record dictionary."""
+        serializer = get_serializer(fields.pop(FORMAT_FIELD.encode(), None))
+        return {
+            name.decode(): serializer.loads(value) for name, value in fields.items()
+        }
+
+    def _decode_result(self, fields):
+        """Decode the result of a `HGETALL`.
+
+        :return: tuple of the decoded record, `None` if missing, and a flag
+            telling if the record is stored in a legacy format
+        """
+        if not fields:
+            return None, False
+        is_legacy = FORMAT_FIELD.encode() not in fields
+        return self._decode(fields), is_legacy
+
+    def _migrate(self, pipe, migrations):
+        """Rewrite records stored in a legacy format."""
+        for key, data in migrations.items():
+            pipe.delete(self._key(key))
+            pipe.hset(self._key(key), mapping=self._encode(data, with_format=True))
+
+    @staticmethod
+    def _prune(pipe, members, values):
+        """Remove the index members referencing missing objects.
+
+        :param members: list of (command removing the member, index key,
+            member, object key) tuples
+        :param values: stored objects of the members, `None` if missing
+        :return: list of stored objects
+        """
+        for (remove, index_key, member, _), value in zip(members, values, strict=True):
+            if value is None:
+                getattr(pipe, remove)(index_key, member)
+        return [value for value in values if value is not None]
+
+    def _filter_members(self, members, index_type, search_term):
+        """Filter index members on the objects' id."""
+        if search_term == "*":
+            return members
+        pattern = f"{index_type}:{search_term}*"
+        return [
+            member
+            for member in members
+            if fnmatch(self._untag(member[-1].decode()), pattern)
+        ]
+
+    @staticmethod
+    def _untag(key):
+        """Remove the hash tags of a key."""
+        return key.replace("{", "").replace("}", "")
+
+    def _mutation(
+        self,
+        record,
+        *,
+        fields=None,
+        removed=(),
+        replace=False,
+        delete=False,
+        indexes=None,
+        stale_indexes=None,
+    ):
+        """Describe a write or a deletion of the object.
+
+        :param record: the object
+        :param fields: encoded fields to set
+        :param removed: names of the fields to remove
+        :param replace: remove the stored fields first
+        :param delete: delete the object
+        :param indexes: indexes to add the object to
+        :param stale_indexes: indexes to remove the object from
+        :return: the mutation
+        """
+        expire = 0
+        if self.record_ttl:
+            expire = self.record_ttl if record.expires else -1
+        return {
+            "key": record.get_key(),
+            "record_type": record.record_type,
+            "id": record.id,
+            "delete": delete,
+            "replace": replace,
+            "expire": expire,
+            "score": self._score(record),
+            "fields": fields or {},
+            "removed": list(removed),
+            "added_indexes": [
+                self._index_key(record.record_type, name, value)
+                for name, value in (indexes or {}).items()
+            ],
+            "removed_indexes": [
+                self._index_key(record.record_type, name, value)
+                for name, value in (stale_indexes or {}).items()
+            ],
+        }
+
+    def _add(self, record):
+        """Get the mutation storing the object."""
+        indexes = record.get_indexes()
+        record.pop_changes()
+        mutation = self._mutation(
+            record,
+            fields=self._encode(record.dumps(), with_format=True),
+            replace=True,
+            indexes=indexes,
+        )
+        record.stored_indexes = indexes
+        return mutation
+
+    def _update(self, record):
+        """Get the mutation storing the object's changed fields."""
+        indexes = record.get_indexes()
+        stale_indexes = {
+            name: value
+            for name, value in record.stored_indexes.items()
+            if indexes.get(name) != value
+        }
+        changed, removed = record.pop_changes()
+        mutation = self._mutation(
+            record,
+            fields=self._encode({name: record[name] for name in changed}),
+            removed=removed,
+            indexes=indexes,
+            stale_indexes=stale_indexes,
+        )
+        record.stored_indexes = indexes
+        return mutation
+
+    def _rewrites(self, records, mutations, results):
+        """Get the mutations rewriting the objects missing when updated.
+
+        The changed fields of a missing object, e.g. expired, would be
+        written as a fragment of the object: it is written entirely instead.
+
+        :param records: the updated objects
+        :param mutations: the mutations updating the objects
+        :param results: the first result of each mutation, `0` if the object
+            is missing
+        :return: the mutations rewriting the missing objects
+        """
+        rewrites = []
+        for record, mutation, result in zip(records, mutations, results, strict=True):
+            if result == 0:
+                rewrite = self._add(record)
+                rewrite["removed_indexes"] = mutation["removed_indexes"]
+                rewrites.append(rewrite)
+        return rewrites
+
+    def _delete(self, record):
+        """Get the mutation deleting the object."""
+        mutation = self._mutation(record, delete=True)
+        # the stored and current indexes differ if the object changed
+        mutation["removed_indexes"] = list(
+            dict.fromkeys(
+                self._index_key(record.record_type, name, value)
+                for indexes in (record.stored_indexes, record.get_indexes())
+                for name, value in indexes.items()
+            )
+        )
+        return mutation
+
+    def _queue_mutation(self, pipe, mutation):
+        """Add the mutation to the pipeline.
+
+        The first command of the mutation of a partial update results in `0`
+        if the object is missing.
+        """
+        if not self.hash_tags:
+            keys = [
+                self._key(mutation["key"]),
+                self._index_key(mutation["record_type"]),
+                self._members_key(mutation["record_type"]),
+                self._key("record_types"),
+                *mutation["added_indexes"],
+                *mutation["removed_indexes"],
+            ]
+            args = [
+                int(mutation["delete"]),
+                int(mutation["replace"]),
+                mutation["expire"],
+                mutation["record_type"],
+                mutation["id"],
+                mutation["key"],
+                len(mutation["fields"]),
+                len(mutation["removed"]),
+                len(mutation["added_indexes"]),
+                mutation["score"],
+                *(item for field in mutation["fields"].items() for item in field),
+                *mutation["removed"],
+            ]
+            pipe.evalsha(MUTATION_SCRIPT_SHA, len(keys), *keys, *args)
+            return
+        # scripts can't access the keys of several cluster slots
+        member = mutation["key"]
+        key = self._key(member)
+        type_index = self._index_key(mutation["record_type"])
+        type_members = self._members_key(mutation["record_type"])
+        score = {member: mutation["score"]}
+        if mutation["delete"]:
+            pipe.unlink(key)
+            pipe.hdel(type_index, mutation["id"])
+            pipe.zrem(type_members, member)
+        else:
+            if mutation["replace"]:
+                pipe.delete(key)
+            else:
+                # the fragment written if the object is missing is replaced
+                # by its rewrite
+                pipe.exists(key)
+            if mutation["fields"]:
+                pipe.hset(key, mapping=mutation["fields"])
+            if mutation["removed"]:
+                pipe.hdel(key, *mutation["removed"])
+            if mutation["expire"] > 0:
+                pipe.expire(key, mutation["expire"])
+            elif mutation["expire"] < 0:
+                pipe.persist(key)
+            pipe.sadd(self._key("record_types"), mutation["record_type"])
+            pipe.hset(type_index, mutation["id"], member)
+            pipe.zadd(type_members, score)
+        for index_key in mutation["added_indexes"]:
+            pipe.zadd(index_key, score)
+        for index_key in mutation["removed_indexes"]:
+            pipe.zrem(index_key, member)
+
+    def _touch(self, pipe, records):
+        """Add the refresh of the objects' expiry to the pipeline."""
+        if not self.record_ttl:
+            return
+        for record in records:
+            if record.expires:
+                key = record.get_key()
+                pipe.expire(self._key(key), self.record_ttl)
+                score = {key: self._score(record)}
+                pipe.zadd(self._members_key(record.record_type), score, xx=True)
+                for name, value in record.stored_indexes.items():
+                    index_key = self._index_key(record.record_type, name, value)
+                    pipe.zadd(index_key, score, xx=True)
+
+
+class Sip2RedisDatastore(RedisLayout, Datastore):
+    """Redis datastore for sip2.
+
+    Records are stored as hashes under their own key, with one field per
+    top-level record field, so that updates only write the changed fields.
+    Lookups never scan the keyspace, they go through index keys maintained
+    on add, update and delete:
+
+    - ``index:<record_type>``: hash mapping record id to record key.
+    - ``index:<record_type>:members``: sorted set of the record keys.
+    - ``index:<record_type>:<name>:<value>``: sorted set of record keys for
+      each index returned by ``record.get_indexes()``.
+    - ``record_types``: set of stored record types.
+
+    The transaction journal is the ``journal`` stream and leases are
+    ``lease:<name>`` strings expiring with the lease.
+
+    All the keys are prefixed with `SIP2_DATASTORE_REDIS_PREFIX` so that the
+    Redis database can be shared, e.g. with the Invenio caches: `flush` only
+    deletes the prefixed keys. Index members are the unprefixed record keys.
+
+    Fields are encoded with the serializer defined by
+    `SIP2_DATASTORE_SERIALIZER`. Records written with another serializer are
+    read using their format marker and records written before the format
+    markers (jsonpickle encoded hashes or strings) are migrated when read.
+
+    Records which expire, see ``record.expires``, are written with a time to
+    live of `SIP2_DATASTORE_RECORD_TTL` seconds, refreshed by `touch`. Index
+    members referencing expired records are pruned when they are read.
+
+    Change notifications are broadcast on the
+    `SIP2_DATASTORE_INVALIDATION_CHANNEL` pub/sub channel, so that
+    subscribers of all the processes sharing the datastore are notified.
+    """
+
+    def __init__(self, app=None, **kwargs):
+        """Initialize the datastore."""
+        super().__init__(app, **kwargs)
+        app = app or current_app
+        self.init_layout(app)
+        self.datastore = self.connect(app)
+        self._acquire_lease = self.datastore.register_script(ACQUIRE_LEASE_SCRIPT)
+        self._release_lease = self.datastore.register_script(RELEASE_LEASE_SCRIPT)
+        self._listener = None
+
+    def _read(self, keys):
+        """Read and decode records, migrating records in a legacy format."""
+        pipe = self.datastore.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(self._key(key))
+        results = pipe.execute(raise_on_error=False)
+
+        records = []
+        migrations = {}
+        for key, fields in zip(keys, results, strict=True):
+            if isinstance(fields, ResponseError):
+                # record stored as a string before the hash layout
+                data = get_serializer().loads(self.datastore.get(self._key(key)))
+                is_legacy = True
+            else:
+                data, is_legacy = self._decode_result(fields)
+            if is_legacy:
+                migrations[key] = data
+            records.append(data)
+
+        if migrations:
+            pipe = self.datastore.pipeline(transaction=self.transaction)
+            self._migrate(pipe, migrations)
+            pipe.execute()
+        return records
+
+    def _get_indexed(self, members):
+        """Get the objects referenced by index members.
+
+        Members referencing missing objects, deleted or expired, are removed
+        from their index.
+
+        :param members: list of (command removing the member, index key,
+            member, object key) tuples
+        :return: list of stored objects
+        """
+        values = self.get_many([key for *_, key in members])
+        pipe = self.datastore.pipeline(transaction=False)
+        values = self._prune(pipe, members, values)
+        if len(pipe):
+            pipe.execute()
+        return values
+
+    def _type_members(self, record_type):
+        """Get the index members of all objects of the given type."""
+        index_key = self._index_key(record_type)
+        return [
+            ("hdel", index_key, id_, key)
+            for id_, key in self.datastore.hgetall(index_key).items()
+        ]
+
+    def get(self, id_, record_type=None):
+        """Retrieve object for given id.
+
+        :param id_: the object's id, or the object's key if no record type
+            is given
+        :param record_type: the object's type
+        :return: the stored object
+        """
+        key = id_
+        if record_type:
+            key = self.datastore.hget(self._index_key(record_type), id_)
+            if key is None:
+                return None
+        return self._read([key])[0]
+
+    def get_many(self, keys):
+        """Retrieve objects for given keys in a single round-trip.
+
+        :param keys: the objects' keys
+        :return: list of stored objects, `None` for missing keys
+        """
+        return self._read(list(keys))
+
+    def _apply(self, mutations):
+        """Apply the mutations in a single round-trip.
+
+        :param mutations: the mutations
+        :return: the first result of each mutation
+        """
+        try:
+            return self._execute(mutations)
+        except NoScriptError:
+            # the script cache is empty, e.g. after a restart or a failover
+            self.datastore.script_load(MUTATION_SCRIPT)
+            return self._execute(mutations)
+
+    def _execute(self, mutations):
+        """Execute the mutations in a pipeline."""
+        pipe = self.datastore.pipeline(transaction=False)
+        positions = []
+        for mutation in mutations:
+            positions.append(len(pipe))
+            self._queue_mutation(pipe, mutation)
+        results = pipe.execute()
+        return [results[position] for position in positions]
+
+    def add(self, record, id_=None, **kwargs):
+        """Store the object.
+
+        :param record: the object
+        :param id_: the object's id
+        """
+        self._apply([self._add(record)])
+
+    def update(self, record, **kwargs):
+        """Store the changed fields of the object.
+
+        :param record: the object
+        """
+        self.update_many([record])
+
+    def update_many(self, records):
+        """Store the changed fields of the objects in a single round-trip.
+
+        Missing objects, e.g. expired, are written entirely.
+
+        :param records: the objects
+        """
+        with keep_changes_on_error(records):
+            mutations = [self._update(record) for record in records]
+            results = self._apply(mutations)
+            rewrites = self._rewrites(records, mutations, results)
+            if rewrites:
+                self._apply(rewrites)
+
+    def touch(self, records):
+        """Refresh the expiry of the stored objects in a single round-trip.
+
+        :param records: the objects
+        """
+        pipe = self.datastore.pipeline(transaction=False)
+        self._touch(pipe, records)
+        if len(pipe):
+            pipe.execute()
+
+    def delete(self, record, record_type=None):
+        """Delete the specific key.
+
+        :param record: the object
+        :param record_type: the object's type
+        """
+        self._apply([self._delete(record)])
+
+    def delete_many(self, records):
+        """Delete the objects in a single round-trip.
+
+        :param records: the objects
+        """
+        if records:
+            self._apply([self._delete(record) for record in records])
+
+    def flush(self):
+        """Flush the datastore.
+
+        With a key prefix, only the prefixed keys are deleted, so that the
+        Redis database can be shared with other applications.
+        """
+        if self.prefix:
+            batch = []
+            for key in self.datastore.scan_iter(match=f"{self.prefix}*", count=1000):
+                batch.append(key)
+                if len(batch) >= FLUSH_BATCH_SIZE:
+                    self.datastore.unlink(*batch)
+                    batch = []
+            if batch:
+                self.datastore.unlink(*batch)
+        else:
+            self.datastore.flushdb()
+        self.publish("*")
+
+    def subscribe(self, callback):
+        """Register a callback notified when stored objects change.
+
+        The first subscription starts a thread listening to the notifications
+        published by the other processes.
+
+        :param callback: function called with the keys of the changed objects
+        """
+        super().subscribe(callback)
+        if self._listener is None:
+            pubsub = self.datastore.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: self._on_message})
+            self._listener = pubsub.run_in_thread(
+                sleep_time=1, daemon=True, exception_handler=self._on_error
+            )
+
+    def _on_message(self, message):
+        """Notify the local subscribers of a published change."""
+        super().publish(*json.loads(message["data"]))
+
+    @staticmethod
+    def _on_error(error, *args):  # noqa: ARG004
+        """Keep listening after a connection error."""
+        logger.warning(f"datastore notifications error: {error}")
+        sleep(1)
+
+    def publish(self, *keys):
+        """Notify the subscribers of all processes that the objects changed.
+
+        :param keys: the objects' keys
+        """
+        super().publish(*keys)
+        self.datastore.publish(self.channel, json.dumps(keys))
+
+    def all(self, record_type=None):
+        """Return all object in datastore.
+
+        :param record_type: the object's type
+        :return: list of stored objects
+        """
+        if record_type:
+            members = self._type_members(record_type)
+        else:
+            members = [
+                member
+                for name in self.datastore.smembers(self._key("record_types"))
+                for member in self._type_members(name.decode())
+            ]
+        yield from self._get_indexed(members)
+
+    def count(self, record_type=None, filter_query=None):
+        """Return the number of objects in the datastore.
+
+        Objects are counted from the size of their index, without being
+        read, once the members of expired objects are removed.
+
+        :param record_type: the object's type
+        :param filter_query: index to count, formatted as `<name>:<value>`
+        :return: number of stored objects
+        """
+        if filter_query:
+            name, _, value = filter_query.partition(":")
+            index_keys = [self._index_key(record_type, name, value)]
+        elif record_type:
+            index_keys = [self._members_key(record_type)]
+        else:
+            index_keys = [
+                self._members_key(name.decode())
+                for name in self.datastore.smembers(self._key("record_types"))
+            ]
+        pipe = self.datastore.pipeline(transaction=False)
+        self._queue_count(pipe, index_keys)
+        return self._count_result(pipe.execute())
+
+    def search(self, search_term="*", index_type="*", filter_query=None):
+        """Search object in the datastore.
+
+        :param search_term: pattern matched against the object's id
+        :param index_type: the object's type
+        :param filter_query: index to search in, formatted as `<name>:<value>`
+        :return: list of stored objects
+        """
+        if filter_query:
+            name, _, value = filter_query.partition(":")
+            index_key = self._index_key(index_type, name, value)
+            members = [
+                ("zrem", index_key, key, key)
+                for key in self.datastore.zrange(index_key, 0, -1)
+            ]
+        else:
+            members = self._type_members(index_type)
+        return self._get_indexed(self._filter_members(members, index_type, search_term))
+
+    def append_journal(self, entries, maxlen):
+        """Append transactions to the journal stream in a single round-trip.
+
+        The stream is trimmed to about `maxlen` transactions, Redis trimming
+        whole nodes of the stream only.
+
+        :param entries: dictionaries of string values
+        :param maxlen: maximum number of transactions kept in the journal
+        """
+        pipe = self.datastore.pipeline(transaction=False)
+        for entry in entries:
+            pipe.xadd(self._key(JOURNAL_KEY), entry, maxlen=maxlen, approximate=True)
+        pipe.execute()
+
+    def read_journal(self, after=None, count=100):
+        """Read transactions from the journal stream, oldest first.
+
+        :param after: id of the last transaction read, `None` to read from
+            the oldest transaction
+        :param count: maximum number of transactions read
+        :return: list of (transaction id, transaction) tuples
+        """
+        return [
+            (
+                entry_id.decode(),
+                {name.decode(): value.decode() for name, value in fields.items()},
+            )
+            for entry_id, fields in self.datastore.xrange(
+                self._key(JOURNAL_KEY), min=f"({after}" if after else "-", count=count
+            )
+        ]
+
+    def acquire_lease(self, name, owner, ttl):
+        """Acquire or renew a lease, unless another owner holds it.
+
+        :param name: the lease's name
+        :param owner: the lease's owner
+        :param ttl: time, in seconds, before the lease expires
+        :return: `True` if the owner holds the lease
+        """
+        key = self._key(f"lease:{name}")
+        return bool(self._acquire_lease(keys=[key], args=[owner, int(ttl * 1000)]))
+
+    def release_lease(self, name, owner):
+        """Release a lease held by the given owner.
+
+        :param name: the lease's name
+        :param owner: the lease's owner
+        """
+        self._release_lease(keys=[self._key(f"lease:{name}")], args=[owner])
+
+    def _move_legacy_keys(self, record_type):
+        """Move the objects stored without the key prefix under the prefix.
+
+        Objects stored before the key prefix was introduced are moved as is,
+        they are migrated to the current format when they are read. An
+        object already stored under the prefix is newer and is kept.
+
+        :param record_type: the object's type
+        """
+        # the layout without prefix never ran on a Redis Cluster, where the
+        # keys of a record change with the hash tags
+        if not self.prefix or self.hash_tags:
+            return
+        for key in self.datastore.scan_iter(match=f"{record_type}:*"):
+            if not self.datastore.renamenx(key, self._key(key)):
+                self.datastore.unlink(key)
+
+    def reindex(self, record_classes):
+        """Rebuild the indexes from the stored objects.
+
+        This is a maintenance operation: it iterates over the whole keyspace
+        with `SCAN` and must not be used on the request path. Objects stored
+        without the key prefix, by a previous version, are moved under the
+        prefix first.
+
+        :param record_classes: record classes to reindex
+        :return: number of reindexed objects
+        """
+        count = 0
+        for record_class in record_classes:
+            self._move_legacy_keys(record_class.record_type)
+            # drop the indexes first, they may not have the current layout
+            index_key = self._index_key(record_class.record_type)
+            self.datastore.unlink(index_key)
+            for key in self.datastore.scan_iter(match=f"{index_key}:*"):
+                self.datastore.unlink(key)
+            pattern = f"{self.prefix}{record_class.record_type}:*"
+            for key in self.datastore.scan_iter(match=pattern):
+                data = self.get(key.decode()[len(self.prefix) :])
+                if not data or "id" not in data:
+                    continue
+                record = record_class(data)
+                pipe = self.datastore.pipeline(transaction=self.transaction)
+                self._add_indexes(pipe, record, record.get_indexes())
+                pipe.execute()
+                count += 1
+        return count
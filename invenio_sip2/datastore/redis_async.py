@@ -0,0 +1,268 @@
+#
+# INVENIO-SIP2
+# Copyright (C) 2026 UCLouvain
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Asynchronous Redis datastore for SIP2 socket server."""
+
+import json
+
+import redis.asyncio
+from flask import current_app
+from redis.exceptions import NoScriptError, ResponseError
+
+from invenio_sip2.datastore.base import AsyncDatastore, keep_changes_on_error
+from invenio_sip2.datastore.redis import (
+    MUTATION_SCRIPT,
+    RELEASE_LEASE_SCRIPT,
+    RedisLayout,
+)
+from invenio_sip2.datastore.serializers import get_serializer
+
+
+class Sip2AsyncRedisDatastore(RedisLayout, AsyncDatastore):
+    """Asynchronous Redis datastore for sip2.
+
+    Uses `redis.asyncio` with the same key layout, encoding and indexes as
+    `Sip2RedisDatastore`, so both datastores can be used on the same data.
+    The client connects lazily and must be used from a single event loop.
+    """
+
+    def __init__(self, app=None, **kwargs):
+        """Initialize the datastore."""
+        app = app or current_app
+        self.init_layout(app)
+        self.datastore = self.connect(app, redis.asyncio)
+        self._release_lease = self.datastore.register_script(RELEASE_LEASE_SCRIPT)
+
+    async def _read(self, keys):
+        """Read and decode records, migrating records in a legacy format."""
+        async with self.datastore.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.hgetall(self._key(key))
+            results = await pipe.execute(raise_on_error=False)
+
+        records = []
+        migrations = {}
+        for key, fields in zip(keys, results, strict=True):
+            if isinstance(fields, ResponseError):
+                # record stored as a string before the hash layout
+                data = get_serializer().loads(await self.datastore.get(self._key(key)))
+                is_legacy = True
+            else:
+                data, is_legacy = self._decode_result(fields)
+            if is_legacy:
+                migrations[key] = data
+            records.append(data)
+
+        if migrations:
+            async with self.datastore.pipeline(transaction=self.transaction) as pipe:
+                self._migrate(pipe, migrations)
+                await pipe.execute()
+        return records
+
+    async def _get_indexed(self, members):
+        """Get the objects referenced by index members, pruning missing ones."""
+        values = await self.get_many([key for *_, key in members])
+        async with self.datastore.pipeline(transaction=False) as pipe:
+            values = self._prune(pipe, members, values)
+            if len(pipe):
+                await pipe.execute()
+        return values
+
+    async def _type_members(self, record_type):
+        """Get the index members of all objects of the given type."""
+        index_key = self._index_key(record_type)
+        ids = await self.datastore.hgetall(index_key)
+        return [("hdel", index_key, id_, key) for id_, key in ids.items()]
+
+    async def get(self, id_, record_type=None):
+        """Retrieve object for given id.
+
+        :param id_: the object's id, or the object's key if no record type
+            is given
+        :param record_type: the object's type
+        :return: the stored object
+        """
+        key = id_
+        if record_type:
+            key = await self.datastore.hget(self._index_key(record_type), id_)
+            if key is None:
+                return None
+        return (await self._read([key]))[0]
+
+    async def get_many(self, keys):
+        """Retrieve objects for given keys in a single round-trip.
+
+        :param keys: the objects' keys
+        :return: list of stored objects, `None` for missing keys
+        """
+        return await self._read(list(keys))
+
+    async def _apply(self, mutations):
+        """Apply the mutations in a single round-trip.
+
+        :param mutations: the mutations
+        :return: the first result of each mutation
+        """
+        try:
+            return await self._execute(mutations)
+        except NoScriptError:
+            # the script cache is empty, e.g. after a restart or a failover
+            await self.datastore.script_load(MUTATION_SCRIPT)
+            return await self._execute(mutations)
+
+    async def _execute(self, mutations):
+        """Execute the mutations in a pipeline."""
+        async with self.datastore.pipeline(transaction=False) as pipe:
+            positions = []
+            for mutation in mutations:
+                positions.append(len(pipe))
+                self._queue_mutation(pipe, mutation)
+            results = await pipe.execute()
+        return [results[position] for position in positions]
+
+    async def add(self, record, id_=None, **kwargs):
+        """Store the object.
+
+        :param record: the object
+        :param id_: the object's id
+        """
+        await self._apply([self._add(record)])
+
+    async def update(self, record, **kwargs):
+        """Store the changed fields of the object.
+
+        :param record: the object
+        """
+        await self.update_many([record])
+
+    async def update_many(self, records):
+        """Store the changed fields of the objects in a single round-trip.
+
+        Missing objects, e.g. expired, are written entirely.
+
+        :param records: the objects
+        """
+        with keep_changes_on_error(records):
+            mutations = [self._update(record) for record in records]
+            results = await self._apply(mutations)
+            rewrites = self._rewrites(records, mutations, results)
+            if rewrites:
+                await self._apply(rewrites)
+
+    async def touch(self, records):
+        """Refresh the expiry of the stored objects in a single round-trip.
+
+        :param records: the objects
+        """
+        async with self.datastore.pipeline(transaction=False) as pipe:
+            self._touch(pipe, records)
+            if len(pipe):
+                await pipe.execute()
+
+    async def delete(self, record, record_type=None):
+        """Delete the specific key.
+
+        :param record: the object
+        :param record_type: the object's type
+        """
+        await self._apply([self._delete(record)])
+
+    async def delete_many(self, records):
+        """Delete the objects in a single round-trip.
+
+        :param records: the objects
+        """
+        if records:
+            await self._apply([self._delete(record) for record in records])
+
+    async def all(self, record_type=None):
+        """Return all object in datastore.
+
+        :param record_type: the object's type
+        :return: list of stored objects
+        """
+        if record_type:
+            record_types = [record_type]
+        else:
+            record_types = [
+                name.decode()
+                for name in await self.datastore.smembers(self._key("record_types"))
+            ]
+        members = []
+        for name in record_types:
+            members.extend(await self._type_members(name))
+        return await self._get_indexed(members)
+
+    async def count(self, record_type=None, filter_query=None):
+        """Return the number of objects in the datastore.
+
+        :param record_type: the object's type
+        :param filter_query: index to count, formatted as `<name>:<value>`
+        :return: number of stored objects
+        """
+        if filter_query:
+            name, _, value = filter_query.partition(":")
+            index_keys = [self._index_key(record_type, name, value)]
+        elif record_type:
+            index_keys = [self._members_key(record_type)]
+        else:
+            index_keys = [
+                self._members_key(name.decode())
+                for name in await self.datastore.smembers(self._key("record_types"))
+            ]
+        async with self.datastore.pipeline(transaction=False) as pipe:
+            self._queue_count(pipe, index_keys)
+            return self._count_result(await pipe.execute())
+
+    async def search(self, search_term="*", index_type="*", filter_query=None):
+        """Search object in the datastore.
+
+        :param search_term: pattern matched against the object's id
+        :param index_type: the object's type
+        :param filter_query: index to search in, formatted as `<name>:<value>`
+        :return: list of stored objects
+        """
+        if filter_query:
+            name, _, value = filter_query.partition(":")
+            index_key = self._index_key(index_type, name, value)
+            members = [
+                ("zrem", index_key, key, key)
+                for key in await self.datastore.zrange(index_key, 0, -1)
+            ]
+        else:
+            members = await self._type_members(index_type)
+        return await self._get_indexed(
+            self._filter_members(members, index_type, search_term)
+        )
+
+    async def publish(self, *keys):
+        """Notify the subscribers of all processes that the objects changed.
+
+        :param keys: the objects' keys
+        """
+        await self.datastore.publish(self.channel, json.dumps(keys))
+
+    async def release_lease(self, name, owner):
+        """Release a lease held by the given owner.
+
+        :param name: the lease's name
+        :param owner: the lease's owner
+        """
+        await self._release_lease(keys=[self._key(f"lease:{name}")], args=[owner])
+
+    async def close(self):
+        """Close the connections of the datastore."""
+        await self.datastore.aclose()
@@ -0,0 +1,141 @@
+#
+# INVENIO-SIP2
+# Copyright (C) 2020 UCLouvain
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Serializers of SIP2 datastore records.
+
+Each stored record holds a format marker (e.g. ``json/1``) naming the
+serializer used to encode its fields, so records written with another
+serializer, or with the legacy jsonpickle encoding which has no marker, can
+still be read and migrated.
+"""
+
+import json
+from abc import ABC, abstractmethod
+
+import jsonpickle
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+FORMAT_FIELD = "_format"
+"""Name of the record field holding the serializer format marker."""
+
+
+class Serializer(ABC):
+    """Abstract serializer of record fields."""
+
+    name = None
+    version = 1
+
+    @property
+    def format(self):
+        """Format marker stored with the records."""
+        return f"{self.name}/{self.version}"
+
+    @abstractmethod
+    def dumps(self, value):
+        """Serialize a field value.
+
+        :param value: the field value
+        :return: the serialized value
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def loads(self, data):
+        """Deserialize a field value.
+
+        :param data: the serialized value
+        :return: the field value
+        """
+        raise NotImplementedError
+
+
+class JSONSerializer(Serializer):
+    """Compact JSON serializer."""
+
+    name = "json"
+
+    def dumps(self, value):
+        """Serialize a field value to compact JSON."""
+        return json.dumps(value, separators=(",", ":"), default=str)
+
+    def loads(self, data):
+        """Deserialize a JSON field value."""
+        return json.loads(data)
+
+
+class MsgpackSerializer(Serializer):
+    """Binary msgpack serializer, requires the `msgpack` package."""
+
+    name = "msgpack"
+
+    def __init__(self):
+        """Initialize the serializer."""
+        if msgpack is None:  # pragma: no cover
+            raise RuntimeError("msgpack serializer requires the msgpack package")
+
+    def dumps(self, value):
+        """Serialize a field value to msgpack."""
+        return msgpack.packb(value, default=str, use_bin_type=True)
+
+    def loads(self, data):
+        """Deserialize a msgpack field value."""
+        return msgpack.unpackb(data, raw=False)
+
+
+class JSONPickleSerializer(Serializer):
+    """Legacy jsonpickle serializer, used to read records without marker."""
+
+    name = "jsonpickle"
+
+    def dumps(self, value):
+        """Serialize a field value with jsonpickle."""
+        return jsonpickle.encode(value)
+
+    def loads(self, data):
+        """Deserialize a jsonpickle field value."""
+        return jsonpickle.decode(data)
+
+
+_serializers = {}
+
+
+def get_serializer(format_=None):
+    """Get serializer instance for the given format marker.
+
+    :param format_: format marker, the legacy serializer is returned if
+        the marker is missing
+    :return: the serializer instance
+    """
+    if isinstance(format_, bytes):
+        format_ = format_.decode()
+    if not format_:
+        format_ = JSONPickleSerializer().format
+    if format_ not in _serializers:
+        for serializer_class in (
+            JSONSerializer,
+            MsgpackSerializer,
+            JSONPickleSerializer,
+        ):
+            if f"{serializer_class.name}/{serializer_class.version}" == format_:
+                _serializers[format_] = serializer_class()
+                break
+        else:
+            raise ValueError(f"unknown serializer format '{format_}'")
+    return _serializers[format_]
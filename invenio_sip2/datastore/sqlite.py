@@ -0,0 +1,382 @@
+#
+# INVENIO-SIP2
+# Copyright (C) 2026 UCLouvain
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""SQLite datastore for SIP2 socket server."""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from time import time
+
+from flask import current_app
+from invenio_base.utils import obj_or_import_string
+
+from invenio_sip2.datastore.base import Datastore, keep_changes_on_error
+from invenio_sip2.datastore.serializers import get_serializer
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    key TEXT PRIMARY KEY,
+    record_type TEXT NOT NULL,
+    id TEXT NOT NULL,
+    format TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_type_id ON records (record_type, id);
+CREATE TABLE IF NOT EXISTS record_indexes (
+    record_type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (record_type, name, value, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS record_indexes_key ON record_indexes (key);
+CREATE TABLE IF NOT EXISTS journal (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+# maximum number of keys bound in a single `IN` clause
+MAX_VARIABLES = 500
+
+
+class Sip2SQLiteDatastore(Datastore):
+    """SQLite datastore for sip2.
+
+    Records are stored in an embedded SQLite database, so that they persist
+    across restarts without any external service. The database is opened in
+    WAL mode, readers never block the writer, and is memory-mapped for reads.
+    Records and their indexes are stored in two tables:
+
+    - ``records``: the encoded record, with its type and id.
+    - ``record_indexes``: one row for each index returned by
+      ``record.get_indexes()``, so that searches are indexed queries.
+
+    The transaction journal is stored, as JSON, in the ``journal`` table and
+    the leases in the ``leases`` table.
+
+    As the database is local to the host, all processes using the datastore
+    must run on the same host. The changes are only notified to the process
+    making them, so the objects of this datastore are never cached.
+    """
+
+    cacheable = False
+
+    def __init__(self, app=None, **kwargs):
+        """Initialize the datastore."""
+        super().__init__(app, **kwargs)
+        app = app or current_app
+        self.path = app.config["SIP2_DATASTORE_SQLITE_PATH"] or str(
+            Path(app.instance_path) / "sip2-datastore.db"
+        )
+        self.mmap_size = app.config["SIP2_DATASTORE_SQLITE_MMAP_SIZE"]
+        self.serializer = obj_or_import_string(
+            app.config["SIP2_DATASTORE_SERIALIZER"]
+        )()
+        self._local = threading.local()
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+    @property
+    def connection(self):
+        """Get the database connection of the current thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            self._local.connection = connection
+        return connection
+
+    def _decode(self, row):
+        """Decode a record row."""
+        if row is None:
+            return None
+        format_, data = row
+        return get_serializer(format_).loads(data)
+
+    def _write(self, connection, record, indexes):
+        """Write the record and its indexes."""
+        key = record.get_key()
+        connection.execute(
+            "INSERT OR REPLACE INTO records (key, record_type, id, format, data) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                key,
+                record.record_type,
+                record.id,
+                self.serializer.format,
+                self.serializer.dumps(record.dumps()),
+            ),
+        )
+        connection.execute("DELETE FROM record_indexes WHERE key = ?", (key,))
+        connection.executemany(
+            "INSERT OR IGNORE INTO record_indexes (record_type, name, value, key) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (record.record_type, name, str(value), key)
+                for name, value in indexes.items()
+            ],
+        )
+        record.stored_indexes = indexes
+
+    def get(self, id_, record_type=None):
+        """Retrieve object for given id.
+
+        :param id_: the object's id, or the object's key if no record type
+            is given
+        :param record_type: the object's type
+        :return: the stored object
+        """
+        if record_type:
+            row = self.connection.execute(
+                "SELECT format, data FROM records WHERE record_type = ? AND id = ?",
+                (record_type, id_),
+            ).fetchone()
+        else:
+            row = self.connection.execute(
+                "SELECT format, data FROM records WHERE key = ?", (id_,)
+            ).fetchone()
+        return self._decode(row)
+
+    def get_many(self, keys):
+        """Retrieve objects for given keys.
+
+        :param keys: the objects' keys
+        :return: list of stored objects, `None` for missing keys
+        """
+        keys = [key.decode() if isinstance(key, bytes) else key for key in keys]
+        rows = {}
+        for start in range(0, len(keys), MAX_VARIABLES):
+            chunk = keys[start : start + MAX_VARIABLES]
+            placeholders = ", ".join("?" * len(chunk))
+            rows.update(
+                (key, (format_, data))
+                for key, format_, data in self.connection.execute(
+                    "SELECT key, format, data FROM records "  # noqa: S608
+                    f"WHERE key IN ({placeholders})",
+                    chunk,
+                )
+            )
+        return [self._decode(rows.get(key)) for key in keys]
+
+    def add(self, record, id_=None, **kwargs):
+        """Store the object.
+
+        :param record: the object
+        :param id_: the object's id
+        """
+        record.pop_changes()
+        with self.connection as connection:
+            self._write(connection, record, record.get_indexes())
+
+    def update(self, record, **kwargs):
+        """Store the object.
+
+        :param record: the object
+        """
+        self.update_many([record])
+
+    def update_many(self, records):
+        """Store the objects in a single transaction.
+
+        The whole record is written, records being always read entirely.
+
+        :param records: the objects
+        """
+        with keep_changes_on_error(records), self.connection as connection:
+            for record in records:
+                changed, removed = record.pop_changes()
+                indexes = record.get_indexes()
+                if changed or removed or indexes != record.stored_indexes:
+                    self._write(connection, record, indexes)
+
+    def delete(self, record, record_type=None):
+        """Delete the specific key.
+
+        :param record: the object
+        :param record_type: the object's type
+        """
+        self.delete_many([record])
+
+    def delete_many(self, records):
+        """Delete the objects in a single transaction.
+
+        :param records: the objects
+        """
+        keys = [(record.get_key(),) for record in records]
+        with self.connection as connection:
+            connection.executemany("DELETE FROM records WHERE key = ?", keys)
+            connection.executemany("DELETE FROM record_indexes WHERE key = ?", keys)
+
+    def flush(self):
+        """Flush the datastore."""
+        with self.connection as connection:
+            connection.execute("DELETE FROM records")
+            connection.execute("DELETE FROM record_indexes")
+            connection.execute("DELETE FROM journal")
+            connection.execute("DELETE FROM leases")
+        self.publish("*")
+
+    def all(self, record_type=None):
+        """Return all object in datastore.
+
+        :param record_type: the object's type
+        :return: list of stored objects
+        """
+        if record_type:
+            rows = self.connection.execute(
+                "SELECT format, data FROM records WHERE record_type = ?",
+                (record_type,),
+            ).fetchall()
+        else:
+            rows = self.connection.execute(
+                "SELECT format, data FROM records"
+            ).fetchall()
+        yield from (self._decode(row) for row in rows)
+
+    def count(self, record_type=None, filter_query=None):
+        """Return the number of objects in the datastore.
+
+        :param record_type: the object's type
+        :param filter_query: index to count, formatted as `<name>:<value>`
+        :return: number of stored objects
+        """
+        if filter_query:
+            name, _, value = filter_query.partition(":")
+            row = self.connection.execute(
+                "SELECT COUNT(*) FROM record_indexes "
+                "WHERE record_type = ? AND name = ? AND value = ?",
+                (record_type, name, value),
+            ).fetchone()
+        elif record_type:
+            row = self.connection.execute(
+                "SELECT COUNT(*) FROM records WHERE record_type = ?", (record_type,)
+            ).fetchone()
+        else:
+            row = self.connection.execute("SELECT COUNT(*) FROM records").fetchone()
+        return row[0]
+
+    def search(self, search_term="*", index_type="*", filter_query=None):
+        """Search object in the datastore.
+
+        :param search_term: pattern matched against the object's id
+        :param index_type: the object's type
+        :param filter_query: index to search in, formatted as `<name>:<value>`
+        :return: list of stored objects
+        """
+        pattern = f"{index_type}:{search_term}*"
+        if filter_query:
+            name, _, value = filter_query.partition(":")
+            rows = self.connection.execute(
+                "SELECT r.format, r.data FROM record_indexes i "
+                "JOIN records r ON r.key = i.key "
+                "WHERE i.record_type = ? AND i.name = ? AND i.value = ? "
+                "AND r.key GLOB ?",
+                (index_type, name, value, pattern),
+            ).fetchall()
+        else:
+            rows = self.connection.execute(
+                "SELECT format, data FROM records WHERE record_type = ? AND key GLOB ?",
+                (index_type, pattern),
+            ).fetchall()
+        return [self._decode(row) for row in rows]
+
+    def append_journal(self, entries, maxlen):
+        """Append transactions to the journal in a single transaction.
+
+        :param entries: dictionaries of string values
+        :param maxlen: maximum number of transactions kept in the journal
+        """
+        with self.connection as connection:
+            connection.executemany(
+                "INSERT INTO journal (data) VALUES (?)",
+                [(json.dumps(entry),) for entry in entries],
+            )
+            connection.execute(
+                "DELETE FROM journal WHERE id <= (SELECT MAX(id) FROM journal) - ?",
+                (maxlen,),
+            )
+
+    def read_journal(self, after=None, count=100):
+        """Read transactions from the journal, oldest first.
+
+        :param after: id of the last transaction read, `None` to read from
+            the oldest transaction
+        :param count: maximum number of transactions read
+        :return: list of (transaction id, transaction) tuples
+        """
+        rows = self.connection.execute(
+            "SELECT id, data FROM journal WHERE id > ? ORDER BY id LIMIT ?",
+            (after or 0, count),
+        ).fetchall()
+        return [(entry_id, json.loads(data)) for entry_id, data in rows]
+
+    def acquire_lease(self, name, owner, ttl):
+        """Acquire or renew a lease, unless another owner holds it.
+
+        :param name: the lease's name
+        :param owner: the lease's owner
+        :param ttl: time, in seconds, before the lease expires
+        :return: `True` if the owner holds the lease
+        """
+        now = time()
+        with self.connection as connection:
+            cursor = connection.execute(
+                "INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, "
+                "expires = excluded.expires "
+                "WHERE leases.owner = excluded.owner OR leases.expires <= ?",
+                (name, owner, now + ttl, now),
+            )
+        return cursor.rowcount == 1
+
+    def release_lease(self, name, owner):
+        """Release a lease held by the given owner.
+
+        :param name: the lease's name
+        :param owner: the lease's owner
+        """
+        with self.connection as connection:
+            connection.execute(
+                "DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner)
+            )
+
+    def reindex(self, record_classes):
+        """Rebuild the indexes from the stored objects.
+
+        :param record_classes: record classes to reindex
+        :return: number of reindexed objects
+        """
+        count = 0
+        with self.connection as connection:
+            for record_class in record_classes:
+                for data in self.all(record_class.record_type):
+                    if "id" not in data:
+                        continue
+                    record = record_class(data)
+                    self._write(connection, record, record.get_indexes())
+                    count += 1
+        return count
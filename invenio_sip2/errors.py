@@ -55,3 +55,7 @@ class ServerMessageError(Exception):
 
 class ServerAlreadyRunning(Exception):
     """Server already running."""
+
+
+class ServerLeaseLost(Exception):
+    """Server lease taken over by another process."""
@@ -17,6 +17,7 @@
 """Flask extension for Invenio-SIP2."""
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from datetime import datetime, timezone
 from logging.handlers import RotatingFileHandler
@@ -28,6 +29,11 @@ from werkzeug.utils import cached_property
 
 from invenio_sip2 import config, handlers
 from invenio_sip2.actions.actions import Action
+from invenio_sip2.datastore import (
+    RecordCache,
+    Sip2AsyncRedisDatastore,
+    Sip2RedisDatastore,
+)
 from invenio_sip2.errors import CommandNotFound
 from invenio_sip2.helpers import MessageTypeFixedField, MessageTypeVariableField
 from invenio_sip2.models import SupportedMessages
@@ -62,6 +68,7 @@ class InvenioSIP2:
         """Extension initialization."""
         self._state = None
         self.datastore = None
+        self.server_cache = None
         if app:
             self.init_app(app)
 
@@ -74,6 +81,12 @@ class InvenioSIP2:
         # Set SIP2 datastore
         datastore_class = obj_or_import_string(app.config["SIP2_DATASTORE_HANDLER"])
         self.datastore = datastore_class(app)
+        self.server_cache = RecordCache(
+            self.datastore,
+            ttl=app.config["SIP2_DATASTORE_SERVER_CACHE_TTL"]
+            if self.datastore.cacheable
+            else 0,
+        )
         # Initialize logging
         if app.config["SIP2_LOGGING_CONSOLE"]:
             self.add_console_handler(app)
@@ -138,6 +151,40 @@ class InvenioSIP2:
         """Return the SIP2 action machine."""
         return _SIP2(action_config=deepcopy(current_app.config["SIP2_MESSAGE_ACTIONS"]))
 
+    @cached_property
+    def async_datastore(self):
+        """Return the asynchronous datastore.
+
+        Unless `SIP2_ASYNC_DATASTORE_HANDLER` is set, the asynchronous
+        datastore sharing the storage of the datastore is used.
+
+        :raises RuntimeError: if the datastore has no asynchronous datastore
+        """
+        handler = self.app.config["SIP2_ASYNC_DATASTORE_HANDLER"]
+        if handler is None:
+            if not isinstance(self.datastore, Sip2RedisDatastore):
+                raise RuntimeError(
+                    f"no asynchronous datastore for {type(self.datastore).__name__},"
+                    " set SIP2_ASYNC_DATASTORE_HANDLER"
+                )
+            handler = Sip2AsyncRedisDatastore
+        datastore_class = obj_or_import_string(handler)
+        return datastore_class(self.app)
+
+    @cached_property
+    def handlers_executor(self):
+        """Return the thread pool running concurrent handler calls.
+
+        :return: the thread pool or `None` if handler calls are not run
+            concurrently
+        """
+        max_workers = self.app.config["SIP2_HANDLERS_MAX_WORKERS"]
+        if max_workers and max_workers > 1:
+            return ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="sip2-handler"
+            )
+        return None
+
     # TODO: reorganize extension implementation
     @cached_property
     def sip2_handlers(self):
@@ -224,9 +271,14 @@ class InvenioSIP2:
         return current_app.config["SIP2_ERROR_DETECTION"]
 
     def supported_messages(self, remote_app):
-        """Supported messages by the automated circulation system."""
+        """Supported messages field by the automated circulation system."""
         return self._state.supported_messages[remote_app]
 
+    def reload_handlers(self, app=None):
+        """Reload remote action handlers from the application config."""
+        app = app or current_app
+        self._state.load_handlers(app.config["SIP2_REMOTE_ACTION_HANDLERS"])
+
 
 class _SIP2:
     """SIP2 action machine."""
@@ -303,6 +355,16 @@ class _Sip2State:
     def __init__(self, app):
         """Initialize state."""
         self.app = app
+        self.load_handlers(app.config["SIP2_REMOTE_ACTION_HANDLERS"])
+
+    def load_handlers(self, handlers_config):
+        """Register remote action handlers.
+
+        The supported messages field of each remote is computed once here and
+        only recomputed when the handler configuration is reloaded.
+
+        :param handlers_config: remote action handlers configuration
+        """
         self.login_handler = {}
         self.system_status_handler = {}
         self.patron_handlers = {}
@@ -312,7 +374,7 @@ class _Sip2State:
         self.supported_messages = {}
 
         # register api handlers
-        for remote, conf in app.config["SIP2_REMOTE_ACTION_HANDLERS"].items():
+        for remote, conf in handlers_config.items():
             supported_messages = SupportedMessages()
             # register login handler
             if conf.get("login_handler"):
@@ -360,4 +422,4 @@ class _Sip2State:
                 )
                 supported_messages.add_supported_message("fee_paid")
 
-            self.supported_messages[remote] = supported_messages
+            self.supported_messages[remote] = str(supported_messages)
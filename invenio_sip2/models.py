@@ -53,12 +53,10 @@ class SupportedMessages:
 
     def __str__(self):
         """Sip2 string representation."""
-        supported_messages_text = ""
-        for handler in self.handlers:
-            supported_messages_text += (
-                "Y" if handler in self.supported_messages else "N"
-            )
-        return supported_messages_text
+        return "".join(
+            "Y" if handler in self.supported_messages else "N"
+            for handler in self.handlers
+        )
 
     def add_supported_message(self, handler):
         """Add supported message."""
@@ -25,6 +25,11 @@ current_sip2 = LocalProxy(lambda: current_app.extensions["invenio-sip2"])
 
 current_datastore = LocalProxy(lambda: current_app.extensions["invenio-sip2"].datastore)
 
+current_async_datastore = LocalProxy(
+    lambda: current_app.extensions["invenio-sip2"].async_datastore
+)
+"""Helper proxy to get the asynchronous datastore."""
+
 """Helper proxy to get the current app sip2 extension."""
 current_logger = LocalProxy(lambda: logging.getLogger("invenio-sip2"))
 """Helper proxy to get the current logger."""
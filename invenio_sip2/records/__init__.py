@@ -16,6 +16,8 @@
 
 """Invenio-SIP2 API."""
 
+from invenio_sip2.records.journal import TransactionJournal
 from invenio_sip2.records.record import Client, Server
+from invenio_sip2.records.writer import WriteBehindBuffer
 
-__all__ = ("Client", "Server")
+__all__ = ("Client", "Server", "TransactionJournal", "WriteBehindBuffer")
@@ -0,0 +1,84 @@
+#
+# INVENIO-SIP2
+# Copyright (C) 2026 UCLouvain
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Transaction journal for SIP2 servers."""
+
+from time import monotonic
+
+from invenio_sip2 import current_datastore as datastore
+from invenio_sip2.proxies import current_logger as logger
+
+
+class TransactionJournal:
+    """Buffer of the transactions appended to the datastore journal.
+
+    Transactions are kept in memory and appended to the journal in a single
+    batch when the buffer is flushed, so that journaling adds no round-trip
+    to the processing of a message. The journal keeps the last `maxlen`
+    transactions, and is read with `datastore.read_journal`.
+    """
+
+    def __init__(self, maxlen, delay=0):
+        """Constructor.
+
+        :param maxlen: maximum number of transactions kept in the journal
+        :param delay: maximum time, in seconds, a transaction stays in the
+            buffer
+        """
+        self.maxlen = maxlen
+        self.delay = delay
+        self._entries = []
+        self._first_entry = None
+
+    def __len__(self):
+        """Number of transactions waiting to be written."""
+        return len(self._entries)
+
+    def add(self, entry):
+        """Add a transaction to the buffer.
+
+        :param entry: dictionary of string values describing the transaction
+        """
+        if not self._entries:
+            self._first_entry = monotonic()
+        self._entries.append(entry)
+
+    def timeout(self):
+        """Time left, in seconds, before the buffer must be flushed.
+
+        :return: the time left or `None` if the buffer is empty
+        """
+        if not self._entries:
+            return None
+        return max(0, self.delay - (monotonic() - self._first_entry))
+
+    def is_due(self):
+        """Check if the buffer must be flushed."""
+        return self.timeout() == 0
+
+    def flush(self):
+        """Append the buffered transactions to the journal.
+
+        Transactions which can't be written are dropped: the journal must
+        never interrupt the server.
+        """
+        if self._entries:
+            entries = self._entries
+            self._entries = []
+            try:
+                datastore.append_journal(entries, self.maxlen)
+            except Exception as err:  # noqa: BLE001
+                logger.warning(f"{len(entries)} journal entries dropped: {err}")
@@ -17,16 +17,29 @@
 """API for manipulating the client."""
 
 import contextlib
-from copy import deepcopy
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from time import monotonic
 from uuid import uuid4
 
+from flask import current_app
+
 from invenio_sip2 import current_datastore as datastore
+from invenio_sip2.api import Message
 from invenio_sip2.errors import ServerAlreadyRunning
+from invenio_sip2.proxies import current_async_datastore as async_datastore
+from invenio_sip2.proxies import current_sip2
 
 
 class Sip2RecordMetadata(dict):
-    """Sip2RecordMetadata class."""
+    """Sip2RecordMetadata class.
+
+    Fields set or deleted on the record are tracked so that the datastore
+    only writes the changed fields on update. If a write-behind buffer is
+    attached to the record, updates are deferred to the buffer.
+
+    Methods prefixed by `a` are the asynchronous variants using the
+    asynchronous datastore, for servers running on an event loop.
+    """
 
     record_type = None
 
@@ -36,6 +49,70 @@ class Sip2RecordMetadata(dict):
         :param data: Dict with record metadata.
         """
         super().__init__(data or {})
+        self._changed = set()
+        self._removed = set()
+        self.write_behind = None
+        # index values as they are stored in the datastore
+        self.stored_indexes = self.get_indexes()
+
+    def __setitem__(self, key, value):
+        """Set field and mark it as changed."""
+        super().__setitem__(key, value)
+        self._changed.add(key)
+        self._removed.discard(key)
+
+    def __delitem__(self, key):
+        """Delete field and mark it as removed."""
+        super().__delitem__(key)
+        self._removed.add(key)
+        self._changed.discard(key)
+
+    def pop(self, key, *args):
+        """Remove field and return its value."""
+        if key in self:
+            self._removed.add(key)
+            self._changed.discard(key)
+        return super().pop(key, *args)
+
+    def pop_changes(self):
+        """Return and reset the fields changed since the last call.
+
+        :return: tuple of changed and removed field names
+        """
+        changes = (self._changed, self._removed)
+        self._changed = set()
+        self._removed = set()
+        return changes
+
+    def peek_changes(self):
+        """Return the fields changed since the last `pop_changes`.
+
+        :return: tuple of changed and removed field names
+        """
+        return set(self._changed), set(self._removed)
+
+    def restore_changes(self, changes):
+        """Track again changes which have not been written.
+
+        Fields changed or removed since the changes were popped keep their
+        latest state.
+
+        :param changes: tuple of changed and removed field names
+        """
+        changed, removed = changes
+        self._changed |= changed - self._removed
+        self._removed |= removed - self._changed
+
+    @classmethod
+    def _build(cls, data, id_=None, **kwargs):
+        """Build a new record."""
+        if not cls.record_type:
+            raise ValueError(f"{cls.__name__} must define a record_type")
+        # TODO: check if record already exist and raise exception
+        data["id"] = id_ or str(uuid4())
+        record = cls(data, **kwargs)
+        record["created"] = datetime.now(timezone.utc).isoformat()
+        return record
 
     @classmethod
     def create(cls, data, id_=None, **kwargs):
@@ -44,16 +121,19 @@ class Sip2RecordMetadata(dict):
         :param data: Dict with metadata.
         :param id_: Specify a UUID to use for the new record.
         """
-        if not cls.record_type:
-            raise ValueError(f"{cls.__name__} must define a record_type")
-        # TODO: check if record already exist and raise exception
-        id_ = id_ or str(uuid4())
+        record = cls._build(data, id_=id_, **kwargs)
+        datastore.add(record, id_=record.id, **kwargs)
+        return record
 
-        data["id"] = id_
-        record = cls(data, **kwargs)
-        record["created"] = datetime.now(timezone.utc).isoformat()
-        datastore.add(record, id_=id_, **kwargs)
+    @classmethod
+    async def acreate(cls, data, id_=None, **kwargs):
+        """Create record asynchronously.
 
+        :param data: Dict with metadata.
+        :param id_: Specify a UUID to use for the new record.
+        """
+        record = cls._build(data, id_=id_, **kwargs)
+        await async_datastore.add(record, id_=record.id, **kwargs)
         return record
 
     @property
@@ -61,32 +141,108 @@ class Sip2RecordMetadata(dict):
         """Shortcut for id."""
         return self.get("id", None)
 
+    @classmethod
+    def build_key(cls, id_, **kwargs):
+        """Build the datastore key of a record.
+
+        :param id_: the record's id
+        :return: the record's key or `None` if the key can't be built from
+            the given parameters
+        """
+        return f"{cls.record_type}:{datastore.hash_tag(id_)}"
+
     def get_key(self):
         """Get generated key for Sip2RecordMetadata object."""
-        return f"{self.record_type}:{self.id}"
+        return self.build_key(self.id)
+
+    def get_indexes(self):
+        """Get the values under which the record is indexed in the datastore.
+
+        :return: dictionary of index name and value
+        """
+        return {}
+
+    @property
+    def expires(self):
+        """Check if the stored record expires unless its expiry is refreshed."""
+        return False
+
+    def _apply(self, data):
+        """Apply dictionary data to the instance.
+
+        :param data: Dict with metadata.
+        :return: `True` if the record must be written to the datastore
+        """
+        if not self.id:
+            return False
+        for key, value in list(data.items()):
+            if key not in self or self[key] != value:
+                self[key] = value
+        self["updated"] = datetime.now(timezone.utc).isoformat()
+        if self.write_behind is not None:
+            self.write_behind.add(self)
+            return False
+        return True
 
     def update(self, data):
         """Update instance with dictionary data.
 
         :param data: Dict with metadata.
         """
-        if self.id:
-            super().update(data)
-            data["updated"] = datetime.now(timezone.utc).isoformat()
+        if self._apply(data):
             datastore.update(self)
 
+    async def aupdate(self, data):
+        """Update instance with dictionary data asynchronously.
+
+        :param data: Dict with metadata.
+        """
+        if self._apply(data):
+            await async_datastore.update(self)
+
     def delete(self):
         """Delete record by uuid."""
+        if self.write_behind is not None:
+            self.write_behind.discard(self)
         datastore.delete(self)
 
+    async def adelete(self):
+        """Delete record by uuid asynchronously."""
+        if self.write_behind is not None:
+            self.write_behind.discard(self)
+        await async_datastore.delete(self)
+
     def search(self, query="*", index_type=None, filter_query=None):
         """Search record by query."""
         return datastore.search(query, index_type=index_type, filter_query=filter_query)
 
+    async def asearch(self, query="*", index_type=None, filter_query=None):
+        """Search record by query asynchronously."""
+        return await async_datastore.search(
+            query, index_type=index_type, filter_query=filter_query
+        )
+
+    @classmethod
+    def get_record_by_id(cls, id_, **kwargs):
+        """Get record by uuid.
+
+        The record is read directly by its key if the key can be built from
+        the given parameters, otherwise it's resolved through the index.
+        """
+        key = cls.build_key(id_, **kwargs)
+        data = datastore.get(key) if key else datastore.get(id_, cls.record_type)
+        if data:
+            return cls(data)
+        return None
+
     @classmethod
-    def get_record_by_id(cls, id_):
-        """Get record by uuid."""
-        data = datastore.get(id_, cls.record_type)
+    async def aget_record_by_id(cls, id_, **kwargs):
+        """Get record by uuid asynchronously."""
+        key = cls.build_key(id_, **kwargs)
+        if key:
+            data = await async_datastore.get(key)
+        else:
+            data = await async_datastore.get(id_, cls.record_type)
         if data:
             return cls(data)
         return None
@@ -96,63 +252,203 @@ class Sip2RecordMetadata(dict):
         """Get all records."""
         return [cls(obj) for obj in datastore.all(cls.record_type)]
 
+    @classmethod
+    async def aget_all_records(cls):
+        """Get all records asynchronously."""
+        return [cls(obj) for obj in await async_datastore.all(cls.record_type)]
+
     @classmethod
     def count(cls):
         """Return number of all records based on record type."""
-        return len(list(datastore.all(cls.record_type)))
+        return datastore.count(cls.record_type)
+
+    @classmethod
+    async def acount(cls):
+        """Return number of all records based on record type asynchronously."""
+        return await async_datastore.count(cls.record_type)
 
     def dumps(self, **kwargs):
-        """Return pure Python dictionary with record metadata."""
-        return deepcopy(dict(self))
+        """Return pure Python dictionary with record metadata.
+
+        The dictionary is a shallow copy: nested values are shared with the
+        record and must not be modified. Datastores storing the objects
+        themselves copy them, the others serialize them.
+        """
+        return dict(self)
 
 
 class Server(Sip2RecordMetadata):
-    """class for SIP2 server."""
+    """class for SIP2 server.
+
+    Servers are read through the process-local server cache. The cached
+    entries are invalidated in all processes when a server is created,
+    updated or deleted.
+    """
 
     record_type = "server"
 
     @property
     def number_of_clients(self):
         """Shortcut for number of clients."""
-        return len(self.get_clients())
+        return datastore.count(Client.record_type, filter_query=f"server:{self.id}")
 
     @property
     def is_running(self):
-        """Check if server is running."""
+        """Check if server is running and its lease did not expire."""
+        if self.get("status") != "running":
+            return False
+        lease_expires = self.get("lease_expires")
+        return not lease_expires or datetime.fromisoformat(
+            lease_expires
+        ) > datetime.now(timezone.utc)
+
+    def get_indexes(self):
+        """Index servers by name and by address."""
+        return {
+            "server_name": self.get("server_name"),
+            "address": f"{self.get('host')}:{self.get('port')}",
+        }
+
+    @property
+    def expires(self):
+        """Running servers expire if their process stops refreshing them."""
         return self.get("status") == "running"
 
+    def update(self, data):
+        """Update server and invalidate cached servers."""
+        super().update(data)
+        self.invalidate_cache()
+
+    async def aupdate(self, data):
+        """Update server asynchronously and invalidate cached servers."""
+        await super().aupdate(data)
+        await self.ainvalidate_cache()
+
     def delete(self):
-        """Delete server and all attached clients."""
+        """Delete server, all attached clients and the server lease."""
         self.clear_all_clients()
+        if "lease_owner" in self:
+            datastore.release_lease(self.get_key(), self["lease_owner"])
         super().delete()
+        self.invalidate_cache()
+
+    async def adelete(self):
+        """Delete server and all attached clients asynchronously."""
+        await async_datastore.delete_many(
+            [Client(client) for client in await self.aget_clients()]
+        )
+        if "lease_owner" in self:
+            await async_datastore.release_lease(self.get_key(), self["lease_owner"])
+        await super().adelete()
+        await self.ainvalidate_cache()
+
+    def invalidate_cache(self):
+        """Invalidate the cached server and the cached list of servers."""
+        current_sip2.server_cache.invalidate(self.get_key(), self.record_type)
+
+    async def ainvalidate_cache(self):
+        """Invalidate the cached server and servers asynchronously."""
+        await current_sip2.server_cache.ainvalidate(
+            async_datastore, self.get_key(), self.record_type
+        )
+
+    @classmethod
+    def get_record_by_id(cls, id_, **kwargs):
+        """Get server by uuid."""
+        key = cls.build_key(id_)
+        data = current_sip2.server_cache.get(key, lambda: datastore.get(key))
+        if data:
+            return cls(data)
+        return None
+
+    @classmethod
+    def get_all_records(cls):
+        """Get all servers."""
+        return [cls(obj) for obj in cls._get_all_servers()]
+
+    @classmethod
+    def _get_all_servers(cls):
+        """Get the data of all servers."""
+        return current_sip2.server_cache.get(
+            cls.record_type, lambda: list(datastore.all(cls.record_type))
+        )
 
     def get_clients(self):
         """Return clients."""
         filter_query = f"server:{self.id}"
         return self.search(index_type=Client.record_type, filter_query=filter_query)
 
+    async def aget_clients(self):
+        """Return clients asynchronously."""
+        filter_query = f"server:{self.id}"
+        return await self.asearch(
+            index_type=Client.record_type, filter_query=filter_query
+        )
+
     def down(self):
-        """Set server status to `Down` and clear all clients data."""
+        """Set server status to `Down` and clear all clients data.
+
+        Nothing is done while another process holds the lease of the server,
+        so a process failing to start a server never stops the running one.
+
+        :return: `True` if the server has been set down
+        """
+        if not self.acquire_lease(self.get("lease_owner") or uuid4().hex):
+            return False
         self["status"] = "down"
         self["stopped_at"] = datetime.now(timezone.utc).isoformat()
-        with contextlib.suppress(KeyError):
-            del self["process_id"]
+        if "lease_owner" in self:
+            datastore.release_lease(self.get_key(), self["lease_owner"])
+        for key in ("process_id", "lease_owner", "lease_expires"):
+            with contextlib.suppress(KeyError):
+                del self[key]
         self.update(self)
         # clear all clients
         self.clear_all_clients()
+        return True
 
     def up(self):
-        """Set server status to `running` and clear all clients data."""
+        """Set server status to `running` and acquire the server lease.
+
+        :raises ServerAlreadyRunning: if another process holds the lease
+        """
+        if not self.acquire_lease(uuid4().hex):
+            # the lease belongs to another process
+            for key in ("lease_owner", "lease_expires"):
+                self.pop(key, None)
+            raise ServerAlreadyRunning(f"server already running {self.id}")
         self["status"] = "running"
         self["started_at"] = datetime.now(timezone.utc).isoformat()
         with contextlib.suppress(KeyError):
             del self["stopped_at"]
         self.update(self)
 
+    def acquire_lease(self, owner=None):
+        """Acquire or renew the lease of the server.
+
+        The lease is held by the process running the server, which renews it
+        on its heartbeat. Once the lease expired, the server is no longer
+        considered running and another process can take it over.
+
+        :param owner: the new owner of the lease, the current owner if not
+            given
+        :return: `True` if the owner holds the lease
+        """
+        ttl = current_app.config["SIP2_DATASTORE_LEASE_TTL"]
+        if not ttl:
+            return True
+        owner = owner or self.get("lease_owner")
+        if not datastore.acquire_lease(self.get_key(), owner, ttl):
+            return False
+        self["lease_owner"] = owner
+        self["lease_expires"] = (
+            datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        ).isoformat()
+        return True
+
     def clear_all_clients(self):
-        """Clear all clients."""
-        for client in self.get_clients():
-            Client(client).delete()
+        """Clear all clients in a single batch."""
+        datastore.delete_many([Client(client) for client in self.get_clients()])
 
     @classmethod
     def create(cls, data, id_=None, **kwargs):
@@ -169,14 +465,74 @@ class Server(Sip2RecordMetadata):
                 raise ServerAlreadyRunning(f"server already running {server.id}")
             return server
 
-        return super().create(data, id_=id_)
+        server = super().create(data, id_=id_)
+        server.invalidate_cache()
+        return server
+
+    @classmethod
+    async def acreate(cls, data, id_=None, **kwargs):
+        """Create record asynchronously.
+
+        :param data: Dict with metadata.
+        :param id_: Specify a UUID to use for the new record.
+        """
+        # check if server already exist in datastore
+        server = await cls.afind_server(**data)
+        if server:
+            # check if server running
+            if server.is_running:
+                raise ServerAlreadyRunning(f"server already running {server.id}")
+            return server
+
+        server = await super().acreate(data, id_=id_)
+        await server.ainvalidate_cache()
+        return server
 
     @classmethod
     def find_server(cls, **kwargs):
-        """Find server depending kwargs."""
+        """Find server depending kwargs.
+
+        Servers are looked up through their name or address index when
+        given, otherwise all the servers are read.
+        """
         with contextlib.suppress(KeyError):
             del kwargs["process_id"]
-        for server in datastore.all(cls.record_type):
+        filter_query = cls._server_filter_query(kwargs)
+        if filter_query:
+            servers = datastore.search(
+                index_type=cls.record_type, filter_query=filter_query
+            )
+        else:
+            servers = cls._get_all_servers()
+        return cls._match_server(servers, kwargs)
+
+    @classmethod
+    async def afind_server(cls, **kwargs):
+        """Find server depending kwargs asynchronously."""
+        with contextlib.suppress(KeyError):
+            del kwargs["process_id"]
+        filter_query = cls._server_filter_query(kwargs)
+        if filter_query:
+            servers = await async_datastore.search(
+                index_type=cls.record_type, filter_query=filter_query
+            )
+        else:
+            servers = await async_datastore.all(cls.record_type)
+        return cls._match_server(servers, kwargs)
+
+    @staticmethod
+    def _server_filter_query(kwargs):
+        """Get the index query finding a server, `None` to read them all."""
+        if "server_name" in kwargs:
+            return f"server_name:{kwargs['server_name']}"
+        if "host" in kwargs and "port" in kwargs:
+            return f"address:{kwargs['host']}:{kwargs['port']}"
+        return None
+
+    @classmethod
+    def _match_server(cls, servers, kwargs):
+        """Get the first server matching all the kwargs."""
+        for server in servers:
             if kwargs.items() <= server.items():
                 # true only if `first` is a subset of `second`
                 return cls(server)
@@ -188,18 +544,56 @@ class Client(Sip2RecordMetadata):
 
     record_type = "client"
 
+    def __init__(self, data, server=None, **kwargs):
+        """Initialize instance with dictionary data.
+
+        :param data: Dict with record metadata.
+        :param server: Server object the client is connected to. If given,
+            the server context is read from memory instead of the datastore.
+        """
+        super().__init__(data, **kwargs)
+        self._server = server
+        self._patron_account = None
+
+    @classmethod
+    def build_key(cls, id_, server_id=None, **kwargs):
+        """Build the datastore key of a client.
+
+        :param id_: the client's id
+        :param server_id: the server's id
+        :return: the client's key or `None` if the server id is unknown
+        """
+        if server_id is None:
+            return None
+        return f"{cls.record_type}:{id_}_server:{datastore.hash_tag(server_id)}"
+
     def get_key(self):
         """Get generated key for Client object."""
-        return f"{self.record_type}:{self.id}_server:{self.server_id}"
+        return self.build_key(self.id, server_id=self.server_id)
+
+    def get_indexes(self):
+        """Index clients by server and by terminal."""
+        return {"server": self.server_id, "terminal": self.terminal}
+
+    @property
+    def expires(self):
+        """Clients expire if their server stops refreshing them."""
+        return True
 
     @property
     def server_id(self):
         """Get server identifier."""
-        return self.get("server").get("id")
+        return self.get("server", {}).get("id")
 
     def get_server(self):
-        """Get server object."""
-        return Server.get_record_by_id(self.server_id)
+        """Get server object.
+
+        The server is resolved from the datastore only once and then kept
+        bound to the client.
+        """
+        if self._server is None:
+            self._server = Server.get_record_by_id(self.server_id)
+        return self._server
 
     @property
     def remote_app(self):
@@ -241,21 +635,68 @@ class Client(Sip2RecordMetadata):
         return self.get("patron_session", None)
 
     def clear_patron_session(self):
-        """Shortcut to library name."""
+        """Clear the patron session and the cached patron account."""
+        self.invalidate_patron_account()
         with contextlib.suppress(KeyError):
             del self["patron_session"]
 
+    def get_patron_account(self, patron_id, language=None):
+        """Get the cached account of a patron.
+
+        Accounts are cached in the memory of the process serving the client
+        during `SIP2_PATRON_ACCOUNT_CACHE_TTL` seconds.
+
+        :param patron_id: the patron's id
+        :param language: the language of the account, any if not given
+        :return: the account or `None` if it is not cached
+        """
+        if self._patron_account:
+            cached_id, cached_language, account, expires = self._patron_account
+            if (
+                cached_id == patron_id
+                and language in (None, cached_language)
+                and monotonic() < expires
+            ):
+                return account
+        return None
+
+    def cache_patron_account(self, patron_id, language, account):
+        """Cache the account of a patron, replacing the cached account.
+
+        :param patron_id: the patron's id
+        :param language: the language of the account
+        :param account: the account returned by the patron handler
+        """
+        ttl = current_app.config["SIP2_PATRON_ACCOUNT_CACHE_TTL"]
+        if ttl:
+            self._patron_account = (patron_id, language, account, monotonic() + ttl)
+
+    def invalidate_patron_account(self):
+        """Remove the cached patron account."""
+        self._patron_account = None
+
     @property
     def last_response_message(self):
-        """Shortcut to user id."""
-        return self.get("last_response", {})
+        """Decoded fields of the last response message."""
+        message = Message.loads(self.get("last_response"))
+        return message.dumps() if message else {}
 
     @property
     def last_request_message(self):
-        """Shortcut to user id."""
-        return self.get("last_request", {})
+        """Decoded fields of the last request message."""
+        message = Message.loads(self.get("last_request"))
+        return message.dumps() if message else {}
 
     @property
     def last_sequence_number(self):
-        """Shortcut to user id."""
-        return self.last_request_message.get("sequence_number")
+        """Sequence number of the last request message."""
+        return self.get("last_request", {}).get("sequence_number")
+
+    def dumps_messages(self):
+        """Dumps the client with its last messages decoded, for monitoring."""
+        data = self.dumps()
+        if "last_request" in data:
+            data["last_request"] = self.last_request_message
+        if "last_response" in data:
+            data["last_response"] = self.last_response_message
+        return data
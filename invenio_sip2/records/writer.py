@@ -0,0 +1,83 @@
+#
+# INVENIO-SIP2
+# Copyright (C) 2026 UCLouvain
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Write-behind buffer for SIP2 records."""
+
+from time import monotonic
+
+from invenio_sip2 import current_datastore as datastore
+
+
+class WriteBehindBuffer:
+    """Buffer coalescing record updates into batched datastore writes.
+
+    Updated records are kept in memory and written to the datastore in a
+    single batch when the buffer is flushed. Several updates of the same
+    record between two flushes result in one write of its changed fields.
+    """
+
+    def __init__(self, delay=0):
+        """Constructor.
+
+        :param delay: maximum time, in seconds, an update stays in the buffer
+        """
+        self.delay = delay
+        self._records = {}
+        self._first_update = None
+
+    def __len__(self):
+        """Number of records waiting to be written."""
+        return len(self._records)
+
+    def add(self, record):
+        """Mark the record as updated."""
+        if not self._records:
+            self._first_update = monotonic()
+        self._records[record.get_key()] = record
+
+    def discard(self, record):
+        """Forget the pending updates of the record."""
+        self._records.pop(record.get_key(), None)
+
+    def timeout(self):
+        """Time left, in seconds, before the buffer must be flushed.
+
+        :return: the time left or `None` if the buffer is empty
+        """
+        if not self._records:
+            return None
+        return max(0, self.delay - (monotonic() - self._first_update))
+
+    def is_due(self):
+        """Check if the buffer must be flushed."""
+        return self.timeout() == 0
+
+    def flush(self):
+        """Write all pending updates to the datastore.
+
+        Updates which can't be written are kept in the buffer, and written
+        on the next flush.
+        """
+        if self._records:
+            records = self._records
+            self._records = {}
+            try:
+                datastore.update_many(list(records.values()))
+            except Exception:
+                records.update(self._records)
+                self._records = records
+                self._first_update = monotonic()
+                raise
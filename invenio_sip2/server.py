@@ -21,14 +21,23 @@ import logging
 import selectors
 import signal
 import socket
+from datetime import datetime, timezone
+from time import monotonic
 
 from flask import current_app
+from redis.exceptions import RedisError
 
 from invenio_sip2.api import Message
-from invenio_sip2.errors import CommandNotFound
+from invenio_sip2.errors import CommandNotFound, ServerLeaseLost
+from invenio_sip2.proxies import current_datastore as datastore
 from invenio_sip2.proxies import current_logger as logger
 from invenio_sip2.proxies import current_sip2
-from invenio_sip2.records import Client, Server
+from invenio_sip2.records import (
+    Client,
+    Server,
+    TransactionJournal,
+    WriteBehindBuffer,
+)
 from invenio_sip2.utils import verify_checksum, verify_sequence_number
 
 
@@ -46,6 +55,26 @@ class SocketServer:
         self.process_id = kwargs.pop("process_id")
         self.server = Server.create(data=vars(self))
         self.server["process_id"] = self.process_id
+        self.write_behind = None
+        if current_app.config["SIP2_DATASTORE_WRITE_BEHIND"]:
+            self.write_behind = WriteBehindBuffer(
+                delay=current_app.config["SIP2_DATASTORE_WRITE_BEHIND_DELAY"]
+            )
+        self.journal = None
+        if current_app.config["SIP2_DATASTORE_JOURNAL_MAXLEN"]:
+            self.journal = TransactionJournal(
+                current_app.config["SIP2_DATASTORE_JOURNAL_MAXLEN"],
+                delay=current_app.config["SIP2_DATASTORE_JOURNAL_DELAY"],
+            )
+        self.heartbeat_interval = None
+        if (
+            current_app.config["SIP2_DATASTORE_RECORD_TTL"]
+            or current_app.config["SIP2_DATASTORE_LEASE_TTL"]
+        ):
+            self.heartbeat_interval = current_app.config[
+                "SIP2_DATASTORE_HEARTBEAT_INTERVAL"
+            ]
+        self.next_heartbeat = None
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         # Avoid bind() exception: OSError: [Errno 48] Address already in use
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -61,37 +90,97 @@ class SocketServer:
 
     def run(self):
         """Run socket server."""
+        # acquire the lease outside of the try block: a server leased by
+        # another process must not be closed, this would set it down.
+        self.server.up()
+        lease_lost = False
         try:
-            self.server.up()
+            if self.heartbeat_interval:
+                self.next_heartbeat = monotonic() + self.heartbeat_interval
             while True:
-                events = self.selector.select(timeout=None)
+                events = self.selector.select(timeout=self.timeout())
                 for key, mask in events:
                     if key.data is None:
                         self.accept_wrapper(key.fileobj)
                     else:
-                        message = key.data
-                        try:
-                            message.process_events(mask)
-                        except (UnicodeDecodeError, CommandNotFound) as err:
-                            logger.debug(err, exc_info=True)
-                            message.close()
-                        except RuntimeError as e:
-                            logger.debug(
-                                f"message cannot be processed: {e}", exc_info=True
-                            )
-                            message.close()
-                        except (OSError, ValueError) as ex:
-                            logger.error(
-                                f"message cannot be processed: {ex}", exc_info=True
-                            )
-                            message.close()
+                        self.process_events(key.data, mask)
+                self.run_scheduled_tasks()
+        except ServerLeaseLost as err:
+            logger.error(err)
+            lease_lost = True
         except OSError as e:
             logger.error(
                 f"SIP2 server closed prematurely ({self.host}, {self.port}: {e}",
                 exc_info=True,
             )
         finally:
-            self.close()
+            if lease_lost:
+                self.stop()
+            else:
+                self.close()
+
+    @staticmethod
+    def process_events(message, mask):
+        """Process the events of a client connection, closing it on error."""
+        try:
+            message.process_events(mask)
+        except (UnicodeDecodeError, CommandNotFound) as err:
+            logger.debug(err, exc_info=True)
+            message.close()
+        except RuntimeError as e:
+            logger.debug(f"message cannot be processed: {e}", exc_info=True)
+            message.close()
+        except (OSError, ValueError) as ex:
+            logger.error(f"message cannot be processed: {ex}", exc_info=True)
+            message.close()
+        except RedisError as ex:
+            logger.error(f"datastore unavailable: {ex}", exc_info=True)
+            message.close()
+
+    def timeout(self):
+        """Time left, in seconds, before the next scheduled task.
+
+        :return: the time left or `None` if no task is scheduled
+        """
+        timeouts = []
+        if self.write_behind and len(self.write_behind):
+            timeouts.append(self.write_behind.timeout())
+        if self.journal and len(self.journal):
+            timeouts.append(self.journal.timeout())
+        if self.next_heartbeat:
+            timeouts.append(max(0, self.next_heartbeat - monotonic()))
+        return min(timeouts, default=None)
+
+    def run_scheduled_tasks(self):
+        """Run the tasks scheduled by the server loop when they are due."""
+        if self.write_behind and self.write_behind.is_due():
+            try:
+                self.write_behind.flush()
+            except RedisError as err:
+                logger.error(f"write-behind flush failed, retry later: {err}")
+        if self.journal and self.journal.is_due():
+            self.journal.flush()
+        if self.next_heartbeat and monotonic() >= self.next_heartbeat:
+            self.heartbeat()
+
+    def heartbeat(self):
+        """Renew the server lease and refresh the expiry of its records.
+
+        :raises ServerLeaseLost: if another process took over the lease
+        """
+        try:
+            if not self.server.acquire_lease():
+                raise ServerLeaseLost(f"lease of server {self.server.id} taken over")
+            self.server.update(self.server)
+            records = [self.server] + [
+                key.data.client
+                for key in self.selector.get_map().values()
+                if key.data is not None
+            ]
+            datastore.touch(records)
+        except RedisError as err:
+            logger.error(f"heartbeat of server {self.server.id} failed: {err}")
+        self.next_heartbeat = monotonic() + self.heartbeat_interval
 
     def accept_wrapper(self, sock):
         """Accept connection wrapper."""
@@ -99,14 +188,50 @@ class SocketServer:
         logger.info(f"accepted connection from {address}")
         connection.setblocking(False)
 
-        message = SocketEventListener(self.server, self.selector, connection, address)
+        try:
+            message = SocketEventListener(
+                self.server,
+                self.selector,
+                connection,
+                address,
+                write_behind=self.write_behind,
+                journal=self.journal,
+            )
+        except RedisError as err:
+            logger.error(f"connection from {address} refused: {err}")
+            connection.close()
+            return
         self.selector.register(connection, selectors.EVENT_READ, data=message)
 
     def close(self):
         """Close socket server."""
         with contextlib.suppress(Exception):
             self.selector.close()
-        self.server.down()
+        try:
+            if self.write_behind:
+                self.write_behind.flush()
+            if self.journal:
+                self.journal.flush()
+            self.server.down()
+        except RedisError as err:
+            # the server records expire with their ttl
+            logger.error(f"server {self.server.id} not closed: {err}")
+
+    def stop(self):
+        """Stop serving after the server lease was taken over.
+
+        The listener and the client connections are closed, but the server
+        record, now owned by the process holding the lease, is left as is.
+        """
+        for key in list(self.selector.get_map().values()):
+            if key.data is None:
+                with contextlib.suppress(Exception):
+                    self.selector.unregister(key.fileobj)
+                    key.fileobj.close()
+            else:
+                key.data.close()
+        with contextlib.suppress(Exception):
+            self.selector.close()
 
     def handler_stop_signals(self, signum, frame):
         """Handle stop signals."""
@@ -118,7 +243,9 @@ class SocketEventListener:
 
     sock = None
 
-    def __init__(self, server, selector, sock, addr):
+    def __init__(
+        self, server, selector, sock, addr, *, write_behind=None, journal=None
+    ):
         """Constructor."""
         self.server = server
         self.selector = selector
@@ -133,7 +260,10 @@ class SocketEventListener:
         self.error_detection = current_sip2.is_error_detection_enabled
         self.line_terminator = current_sip2.line_terminator
         self.message_encoding = current_sip2.text_encoding
-        self.client = Client.create(data=self.dumps())
+        self.compress_messages = current_app.config["SIP2_DATASTORE_COMPRESS_MESSAGES"]
+        self.client = Client.create(data=self.dumps(), server=self.server)
+        self.client.write_behind = write_behind
+        self.journal = journal
 
     def dumps(self):
         """Dumps record."""
@@ -143,9 +273,9 @@ class SocketEventListener:
             "socket": self.addr[1],
         }
         if self.request:
-            data["last_request"] = self.request.dumps()
+            data["last_request"] = self.request.dumps_raw(self.compress_messages)
         if self.response:
-            data["last_response"] = self.response.dumps()
+            data["last_response"] = self.response.dumps_raw(self.compress_messages)
         return data
 
     def _set_selector_events_mask(self, mode):
@@ -286,17 +416,49 @@ class SocketEventListener:
         finally:
             # Delete reference to socket object for garbage collection
             self.sock = None
-            self.client.delete()
+            try:
+                self.client.delete()
+            except RedisError as err:
+                # the client record expires with its ttl
+                logger.error(f"client {self.client.id} not deleted: {err}")
 
     def process_request(self):
         """Processing of selfcheck message."""
-        self.response = current_sip2.sip2.execute(self.request, client=self.client)
+        start = monotonic()
+        outcome = "error"
+        # never journal the response of the previous transaction
+        self.response = None
+        try:
+            self.response = current_sip2.sip2.execute(self.request, client=self.client)
+            outcome = "ok" if self.response else "no_response"
+        finally:
+            if self.journal is not None:
+                self.journal.add(self.journal_entry(outcome, monotonic() - start))
         if self.request.command != "97":
             self.client.update(self.dumps())
 
         # Set selector to listen for write events, we're done reading.
         self._set_selector_events_mask("w")
 
+    def journal_entry(self, outcome, latency):
+        """Build the journal entry of the current transaction.
+
+        :param outcome: `ok`, `no_response` or `error`
+        :param latency: processing time of the request, in seconds
+        :return: dictionary of string values
+        """
+        return {
+            "date": datetime.now(timezone.utc).isoformat(),
+            "server": self.server.id,
+            "client": self.client.id,
+            "terminal": self.client.terminal or "",
+            "command": self.request.command,
+            "request": self.request.masked_text(),
+            "response": self.response.masked_text() if self.response else "",
+            "latency": f"{latency * 1000:.3f}",
+            "outcome": outcome,
+        }
+
     def create_response(self):
         """Create response message."""
         if self.request:
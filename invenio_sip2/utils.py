@@ -163,7 +163,7 @@ def verify_sequence_number(client, message):
     # we need to return true in following cases :
     # 1. there is no last request message
     # 2. the message type is a resend request message
-    if not client.last_request_message or message.command == "97":
+    if not client.get("last_request") or message.command == "97":
         return True
 
     # get current sequence from tag AY
@@ -66,7 +66,8 @@ def get_server(server_id):
 def get_clients():
     """Display all connected clients to server."""
     try:
-        return jsonify({"clients": Client.get_all_records()})
+        clients = [client.dumps_messages() for client in Client.get_all_records()]
+        return jsonify({"clients": clients})
     except (OSError, KeyError) as error:
         return jsonify({"ERROR": str(error)})
 
@@ -80,18 +81,20 @@ class Monitoring:
         servers = cls.get_servers()
         result = {
             "servers": len(servers),
-            "clients": len(Client.get_all_records()),
+            "clients": Client.count(),
             "status": "green",
         }
 
         if result["servers"]:
             info = {}
             for server in servers:
-                info[server.id] = {"status": server.get("status")}
-                info[server.id]["nb_client"] = cls.get_number_client_by_server(
-                    server.id
-                )
-                if info[server.id]["status"] == "down":
+                status = server.get("status")
+                if status == "running" and not server.is_running:
+                    # the server process stopped without releasing its lease
+                    status = "stale"
+                info[server.id] = {"status": status}
+                info[server.id]["nb_client"] = server.number_of_clients
+                if status in ("down", "stale"):
                     result["status"] = "red"
                 result["servers_info"] = info
         return result
@@ -112,5 +115,5 @@ class Monitoring:
         """Get list of clients by server id."""
         server = Server.get_record_by_id(server_id)
         if server:
-            return server.get_clients()
+            return [Client(data).dumps_messages() for data in server.get_clients()]
         return None
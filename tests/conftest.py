@@ -110,7 +110,9 @@ def base_app(request):
         TESTING=True,
         WTF_CSRF_ENABLED=False,
         CACHE_REDIS_URL="redis://localhost:6379/0",
-        SIP2_DATASTORE_HANDLER="invenio_sip2.datastore:Sip2RedisDatastore",
+        SIP2_DATASTORE_HANDLER=os.environ.get(
+            "SIP2_DATASTORE_HANDLER", "invenio_sip2.datastore:Sip2RedisDatastore"
+        ),
         SIP2_DATASTORE_REDIS_URL="redis://localhost:6379/1",
         SIP2_LOGGING_FS_LOGFILE="./log/sip2.log",
         SIP2_ERROR_DETECTION=True,
@@ -16,15 +16,22 @@
 
 """Invenio-sip2 actions test."""
 
+import threading
+import time
+from functools import partial
 from unittest import mock
 from unittest.mock import MagicMock
 
 import pytest
+from flask import current_app
+from utils import remote_patron_account_handler
 
 from invenio_sip2.actions.base import Action
 from invenio_sip2.api import Message
 from invenio_sip2.decorators import check_selfcheck_authentication
 from invenio_sip2.errors import CommandNotFound
+from invenio_sip2.handlers import patron_handler
+from invenio_sip2.models import SelfcheckCheckin, SelfcheckCheckout
 from invenio_sip2.proxies import current_sip2
 
 
@@ -88,6 +95,26 @@ def test_patron_enable(app, dummy_client, enable_patron_message):
         Message(request=enable_patron_message), client=dummy_client
     )
     assert str(response).startswith("26")
+    assert response.get_field_value("valid_patron") == "Y"
+    assert response.get_field_value("valid_patron_pwd") == "Y"
+
+    # the patron and its password are checked with the patron identifier
+    with (
+        mock.patch(
+            "invenio_sip2.actions.actions.validate_patron_handler",
+            return_value=False,
+        ),
+        mock.patch(
+            "invenio_sip2.actions.actions.authorize_patron_handler",
+            return_value=False,
+        ) as authorize,
+    ):
+        response = current_sip2.sip2.execute(
+            Message(request=enable_patron_message), client=dummy_client
+        )
+    assert authorize.call_args.args[1:] == ("patron_identifier", "patron_pwd")
+    assert response.get_field_value("valid_patron") == "N"
+    assert response.get_field_value("valid_patron_pwd") == "N"
 
 
 def test_patron_status(app, dummy_client, patron_status_message):
@@ -110,6 +137,45 @@ def test_patron_information(app, dummy_client, patron_information_message):
     for field in required_fields:
         assert data[field]
     assert str(response).startswith("64")
+    assert response.get_field_value("valid_patron_pwd") == "Y"
+
+    # the password is checked once, with the id of the patron account
+    dummy_client.invalidate_patron_account()
+    with (
+        mock.patch(
+            "invenio_sip2.actions.actions.patron_handler",
+            return_value=remote_patron_account_handler("patron_pid"),
+        ),
+        mock.patch(
+            "invenio_sip2.actions.actions.authorize_patron_handler",
+            return_value=False,
+        ) as authorize,
+    ):
+        response = current_sip2.sip2.execute(
+            Message(request=patron_information_message), client=dummy_client
+        )
+    authorize.assert_called_once()
+    assert authorize.call_args.args[1:] == ("patron_pid", "patron_pwd")
+    assert response.get_field_value("valid_patron_pwd") == "N"
+    dummy_client.invalidate_patron_account()
+
+
+def test_request_resend(app, dummy_client, patron_information_message):
+    """Test request resend action."""
+    response = current_sip2.sip2.execute(
+        Message(request=patron_information_message), client=dummy_client
+    )
+    dummy_client["last_request"] = Message(
+        request=patron_information_message
+    ).dumps_raw()
+    dummy_client["last_response"] = response.dumps_raw(compress=True)
+    assert dummy_client.last_sequence_number == "3"
+    assert dummy_client.last_request_message["patron_id"]
+    last_response = dummy_client.dumps_messages()["last_response"]
+    assert last_response["message_type"]["command"] == "64"
+
+    resend = current_sip2.sip2.execute(Message(request="97"), client=dummy_client)
+    assert str(response).startswith(str(resend))
 
 
 def test_item_information(app, dummy_client, item_information_message):
@@ -160,6 +226,69 @@ def test_fee_paid(app, dummy_client, fee_paid_message):
     assert str(response).startswith("38")
 
 
+def test_run_concurrently(app):
+    """Test independent handler calls run concurrently."""
+
+    def call(value):
+        time.sleep(0.2)
+        assert current_app.config["SIP2_HANDLERS_MAX_WORKERS"]
+        return value, threading.current_thread().name
+
+    with app.app_context():
+        start = time.monotonic()
+        results = Action.run_concurrently(partial(call, 1), partial(call, 2))
+        assert time.monotonic() - start < 0.35
+        assert [value for value, _ in results] == [1, 2]
+        assert results[1][1].startswith("sip2-handler")
+
+        # handler calls are run one after another without thread pool
+        with mock.patch.dict(current_sip2.__dict__, {"handlers_executor": None}):
+            results = Action.run_concurrently(partial(call, 1), partial(call, 2))
+        assert {name for _, name in results} == {threading.current_thread().name}
+
+
+def test_patron_account_cache(
+    app, dummy_client, patron_information_message, end_patron_session_message
+):
+    """Test the account of the patron is cached during the patron session."""
+    dummy_client.invalidate_patron_account()
+    message = Message(request=patron_information_message)
+    with mock.patch(
+        "invenio_sip2.actions.actions.patron_handler", wraps=patron_handler
+    ) as handler:
+        current_sip2.sip2.execute(message, client=dummy_client)
+        current_sip2.sip2.execute(message, client=dummy_client)
+        handler.assert_called_once()
+    account = dummy_client.get_patron_account("patron_identifier")
+    assert account.hold_items_count == 2
+
+    # the cache is cleared with the patron session
+    current_sip2.sip2.execute(
+        Message(request=end_patron_session_message), client=dummy_client
+    )
+    assert dummy_client.get_patron_account("patron_identifier") is None
+
+
+def test_patron_account_cache_circulation(
+    app, dummy_client, patron_information_message, checkout_message, checkin_message
+):
+    """Test the cached account of the patron is refreshed after circulation."""
+    message = Message(request=patron_information_message)
+    checkout = SelfcheckCheckout("title_id", checkout=True)
+    checkin = SelfcheckCheckin("permanent_location", checkin=True, item_id="item_id")
+    for handler, response, request in (
+        ("checkout_handler", checkout, checkout_message),
+        ("checkin_handler", checkin, checkin_message),
+    ):
+        current_sip2.sip2.execute(message, client=dummy_client)
+        assert dummy_client.get_patron_account("patron_identifier")
+        with mock.patch(
+            f"invenio_sip2.actions.actions.{handler}", return_value=response
+        ):
+            current_sip2.sip2.execute(Message(request=request), client=dummy_client)
+        assert dummy_client.get_patron_account("patron_identifier") is None
+
+
 def test_end_patron_session(app, dummy_client, end_patron_session_message):
     """Test patron enable action."""
     # IMPORTANT NOTE:
@@ -16,9 +16,13 @@
 
 """CLI test."""
 
+import time
+from unittest.mock import patch
+
 from click.testing import CliRunner
 
-from invenio_sip2.cli import selfcheck, start_socket_server
+from invenio_sip2.cli import reindex, selfcheck, start_socket_server, stop_server
+from invenio_sip2.records import Server
 
 
 def test_basic_cli():
@@ -37,3 +41,28 @@ def test_start_server_socker(app):
         ["test_server", "--host", "0.0.0.0", "--port", 78495, "--remote-app", "test"],
     )
     assert result.exit_code == 1
+
+
+def test_reindex(app):
+    """Test reindex datastore."""
+    runner = app.test_cli_runner()
+    result = runner.invoke(reindex)
+    assert result.exit_code == 0
+    assert "records reindexed" in result.output
+
+
+def test_stop_crashed_server(app, server_data):
+    """Test stop a server whose lease expired."""
+    runner = app.test_cli_runner()
+    with app.app_context():
+        server = Server.create(server_data, id_="key_1")
+        with patch.dict(app.config, {"SIP2_DATASTORE_LEASE_TTL": 0.1}):
+            server.up()
+        time.sleep(0.2)
+        name = server.get("server_name")
+
+    result = runner.invoke(stop_server, [name])
+    assert result.exit_code == 0
+    assert "marked as stopped" in result.output
+    result = runner.invoke(stop_server, [name, "--delete"])
+    assert "server already stopped" in result.output
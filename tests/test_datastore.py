@@ -16,13 +16,38 @@
 
 """Invenio-sip2 datastore test."""
 
+import asyncio
+import importlib.util
+import json
+import os
+import time
 from unittest.mock import patch
 
+import jsonpickle
 import pytest
+from redis.cluster import key_slot
+from redis.exceptions import ConnectionError as RedisConnectionError
 
-from invenio_sip2.datastore import Datastore, Sip2RedisDatastore
+from invenio_sip2.datastore import (
+    Datastore,
+    InMemoryDatastore,
+    JSONSerializer,
+    MsgpackSerializer,
+    RecordCache,
+    Sip2AsyncRedisDatastore,
+    Sip2RedisDatastore,
+    Sip2SQLiteDatastore,
+)
+from invenio_sip2.datastore.serializers import get_serializer
 from invenio_sip2.errors import ServerAlreadyRunning
+from invenio_sip2.records import TransactionJournal, WriteBehindBuffer
 from invenio_sip2.records.record import Client, Server
+from invenio_sip2.views.rest import Monitoring
+
+requires_redis = pytest.mark.skipif(
+    "Redis" not in os.environ.get("SIP2_DATASTORE_HANDLER", "Redis"),
+    reason="records are not stored in the redis datastore",
+)
 
 
 @patch.multiple(Datastore, __abstractmethods__=set())
@@ -33,6 +58,8 @@ def test_datastore_interface(app, server_data):
         ds.add("key", "value")
     with pytest.raises(NotImplementedError):
         ds.get("id_")
+    with pytest.raises(NotImplementedError):
+        ds.get_many(["key"])
     with pytest.raises(NotImplementedError):
         ds.update("key", "value")
     with pytest.raises(NotImplementedError):
@@ -88,3 +115,847 @@ def test_record_metadata(app, server_data, dummy_client_data):
         assert Server.get_record_by_id("nonexistent_id") is None
         assert Server.find_server(server_name="nonexistent_server") is None
         server.delete()
+
+
+def test_record_dumps(app, server_data, dummy_client_data):
+    """Test records are dumped without copying nested values."""
+    with app.app_context():
+        server = Server.create(server_data, id_="key_1")
+        client = Client.create(
+            dict(dummy_client_data, last_request={"_sip2": "9300"}), server=server
+        )
+        data = client.dumps()
+        assert data == client
+        assert data is not client
+        assert data["last_request"] is client["last_request"]
+
+        # stored records are not affected by later changes of the record
+        client["last_request"]["_sip2"] = "9900"
+        assert Client.get_record_by_id(client.id)["last_request"]["_sip2"] == "9300"
+        client.delete()
+        server.delete()
+
+
+def test_find_server(app, server_data):
+    """Test servers are found through their indexes."""
+    with app.app_context():
+        ext = app.extensions["invenio-sip2"]
+        server = Server.create(server_data, id_="key_1")
+        other = Server.create(
+            dict(server_data, id="key_2", server_name="other", port=3007),
+            id_="key_2",
+        )
+        with patch.object(ext.datastore, "all") as datastore_all:
+            assert Server.find_server(server_name="other") == other
+            assert Server.find_server(host="0.0.0.0", port=3006) == server
+            assert Server.find_server(**server_data) == server
+            assert Server.find_server(server_name="other", port=3006) is None
+            datastore_all.assert_not_called()
+        assert Server.find_server(remote_app="test_ils") in (server, other)
+        other.delete()
+        server.delete()
+
+
+def test_server_lease(app, server_data, dummy_client_data):
+    """Test running servers hold a lease which can be taken over."""
+    with app.app_context():
+        datastore = app.extensions["invenio-sip2"].datastore
+        assert datastore.acquire_lease("lease_1", "owner_1", 60)
+        assert datastore.acquire_lease("lease_1", "owner_1", 60)
+        assert not datastore.acquire_lease("lease_1", "owner_2", 60)
+        datastore.release_lease("lease_1", "owner_2")
+        assert not datastore.acquire_lease("lease_1", "owner_2", 60)
+        datastore.release_lease("lease_1", "owner_1")
+        assert datastore.acquire_lease("lease_1", "owner_2", 0.1)
+        time.sleep(0.2)
+        assert datastore.acquire_lease("lease_1", "owner_1", 60)
+        datastore.release_lease("lease_1", "owner_1")
+
+        server = Server.create(server_data, id_="key_1")
+        server.up()
+        assert server.is_running
+        owner = server["lease_owner"]
+        with pytest.raises(ServerAlreadyRunning):
+            Server.create(server_data)
+        stale = Server(dict(server))
+        with pytest.raises(ServerAlreadyRunning):
+            stale.up()
+
+        # a process losing the lease never sets the running server down
+        client = Client.create(dict(dummy_client_data), server=server)
+        assert not stale.down()
+        assert Server.get_record_by_id(server.id).is_running
+        assert Client.get_record_by_id(client.id)
+
+        # the lease of a killed server expires and the server is taken over
+        with patch.dict(app.config, {"SIP2_DATASTORE_LEASE_TTL": 0.1}):
+            assert server.acquire_lease()
+            server.update(server)
+        time.sleep(0.2)
+        assert not Server.get_record_by_id(server.id).is_running
+        assert Monitoring.status()["servers_info"][server.id]["status"] == "stale"
+        taken_over = Server.create(server_data)
+        assert taken_over.id == server.id
+        taken_over.up()
+        assert taken_over.is_running
+        assert taken_over["lease_owner"] != owner
+        assert not server.acquire_lease()
+
+        taken_over.down()
+        assert "lease_owner" not in taken_over
+        assert datastore.acquire_lease(server.get_key(), "owner_1", 60)
+        datastore.release_lease(server.get_key(), "owner_1")
+        taken_over.delete()
+
+
+def test_client_server_context(app, server_data, dummy_client_data):
+    """Test client bound to the server context."""
+    with app.app_context():
+        server = Server.create(server_data, id_="key_1")
+        client = Client.create(dummy_client_data, server=server)
+        with patch.object(Server, "get_record_by_id") as get_record_by_id:
+            assert client.remote_app == server_data["remote_app"]
+            assert client.get_server() is server
+            get_record_by_id.assert_not_called()
+
+        # unbound client resolves its server only once
+        client = Client(client.dumps())
+        with patch.object(
+            Server, "get_record_by_id", return_value=server
+        ) as get_record_by_id:
+            assert client.remote_app == server_data["remote_app"]
+            assert client.remote_app == server_data["remote_app"]
+            get_record_by_id.assert_called_once_with(server.id)
+        client.delete()
+        server.delete()
+
+
+@requires_redis
+def test_redis_datastore_indexes(app, server_data, dummy_client_data):
+    """Test redis datastore indexes."""
+    with app.app_context():
+        datastore = Sip2RedisDatastore(app)
+        datastore.flush()
+        server = Server.create(server_data, id_="key_1")
+        client = Client.create(dict(dummy_client_data), server=server)
+        assert server.get_clients() == [client]
+        assert datastore.search(index_type="client", filter_query="terminal:127.0.0.1")
+        assert datastore.search(client.id, index_type="client") == [client]
+        assert not datastore.search("unknown", index_type="client")
+        assert len(list(datastore.all())) == 2
+
+        # terminal index follows record updates
+        client.update({"terminal": "terminal_1"})
+        assert not datastore.search(
+            index_type="client", filter_query="terminal:127.0.0.1"
+        )
+        assert datastore.search(
+            index_type="client", filter_query="terminal:terminal_1"
+        ) == [client]
+
+        # rebuild lost indexes
+        datastore.datastore.delete(
+            "sip2:index:client", "sip2:index:client:server:key_1"
+        )
+        assert not server.get_clients()
+        assert datastore.reindex([Server, Client]) == 2
+        assert server.get_clients() == [client]
+
+        client.delete()
+        assert not server.get_clients()
+        assert not datastore.search(
+            index_type="client", filter_query="terminal:terminal_1"
+        )
+        assert Client.get_record_by_id(client.id) is None
+        server.delete()
+        assert not list(datastore.all("server"))
+
+
+@requires_redis
+def test_redis_datastore_get_many(app, server_data, dummy_client_data):
+    """Test redis datastore bulk and direct reads."""
+    with app.app_context():
+        datastore = Sip2RedisDatastore(app)
+        datastore.flush()
+        server = Server.create(server_data, id_="key_1")
+        client = Client.create(dict(dummy_client_data), server=server)
+        assert datastore.get_many([]) == []
+        assert datastore.get_many([server.get_key(), "unknown", client.get_key()]) == [
+            server,
+            None,
+            client,
+        ]
+
+        # direct read by key
+        with patch.object(datastore.datastore, "hget") as hget:
+            assert datastore.get(server.get_key()) == server
+            hget.assert_not_called()
+        assert Client.get_record_by_id(client.id, server_id=server.id) == client
+        assert Client.get_record_by_id(client.id) == client
+        assert Client.build_key(client.id) is None
+        server.delete()
+
+
+@requires_redis
+def test_redis_datastore_partial_update(app, server_data, dummy_client_data):
+    """Test redis datastore writes only changed fields on update."""
+    with app.app_context():
+        datastore = Sip2RedisDatastore(app)
+        datastore.flush()
+        server = Server.create(server_data, id_="key_1")
+        client = Client.create(dict(dummy_client_data), server=server)
+        assert client.pop_changes() == (set(), set())
+
+        # unchanged fields are not rewritten
+        datastore.datastore.hset(f"sip2:{client.get_key()}", "ip_address", '"10.0.0.1"')
+        client.update({"ip_address": "127.0.0.1", "socket": 1234})
+        stored = datastore.get(client.get_key())
+        assert stored["ip_address"] == "10.0.0.1"
+        assert stored["socket"] == 1234
+        assert stored["updated"]
+
+        # fields set or deleted on the record are tracked
+        client["patron_session"] = {"patron_id": "patron_id"}
+        client.update({})
+        assert datastore.get(client.get_key())["patron_session"]
+        client.clear_patron_session()
+        assert client.pop_changes() == (set(), {"patron_session"})
+        client.clear_patron_session()
+        client["patron_session"] = {}
+        client.pop("patron_session")
+        client.update({})
+        assert "patron_session" not in datastore.get(client.get_key())
+        server.delete()
+
+
+@pytest.mark.parametrize(
+    "serializer",
+    [
+        "invenio_sip2.datastore:JSONSerializer",
+        pytest.param(
+            MsgpackSerializer,
+            marks=pytest.mark.skipif(
+                importlib.util.find_spec("msgpack") is None,
+                reason="msgpack is not installed",
+            ),
+        ),
+    ],
+)
+def test_redis_datastore_serializers(app, server_data, serializer):
+    """Test redis datastore serializers."""
+    with app.app_context():
+        with patch.dict(app.config, {"SIP2_DATASTORE_SERIALIZER": serializer}):
+            datastore = Sip2RedisDatastore(app)
+        datastore.flush()
+        server = Server(dict(server_data, nested={"list": [1, 2]}))
+        datastore.add(server)
+        stored = datastore.datastore.hget(f"sip2:{server.get_key()}", "_format")
+        assert stored.decode() == datastore.serializer.format
+        assert datastore.get(server.get_key()) == server
+
+        # records written with another serializer are still readable
+        reader = Sip2RedisDatastore(app)
+        assert reader.get(server.get_key()) == server
+        datastore.flush()
+
+
+def test_redis_datastore_migration(app, server_data):
+    """Test redis datastore migrates legacy jsonpickle records."""
+    with app.app_context():
+        datastore = Sip2RedisDatastore(app)
+        datastore.flush()
+        legacy_server = dict(server_data, id="legacy_string")
+        datastore.datastore.set(
+            "sip2:server:legacy_string", jsonpickle.encode(legacy_server)
+        )
+        legacy_hash = dict(server_data, id="legacy_hash")
+        datastore.datastore.hset(
+            "sip2:server:legacy_hash",
+            mapping={k: jsonpickle.encode(v) for k, v in legacy_hash.items()},
+        )
+        assert datastore.get_many(["server:legacy_string", "server:legacy_hash"]) == [
+            legacy_server,
+            legacy_hash,
+        ]
+        for key in ("server:legacy_string", "server:legacy_hash"):
+            assert datastore.datastore.type(f"sip2:{key}") == b"hash"
+            assert datastore.datastore.hget(f"sip2:{key}", "_format") == b"json/1"
+        assert datastore.get("server:legacy_hash") == legacy_hash
+
+        with pytest.raises(ValueError, match="unknown serializer format"):
+            get_serializer("unknown/1")
+        datastore.flush()
+
+
+@requires_redis
+def test_redis_datastore_legacy_keys(app, server_data, dummy_client_data):
+    """Test reindex moves the records stored without prefix under the prefix."""
+    with app.app_context():
+        datastore = app.extensions["invenio-sip2"].datastore
+        redis = datastore.datastore
+        datastore.flush()
+        # records stored by the previous versions, as unprefixed strings
+        redis.set("server:key_1", jsonpickle.encode(server_data))
+        client_data = dict(dummy_client_data, id="client_1")
+        redis.set("client:client_1_server:key_1", jsonpickle.encode(client_data))
+        assert Server.find_server(server_name="server_sip2") is None
+
+        assert datastore.reindex([Server, Client]) == 2
+        assert not redis.exists("server:key_1", "client:client_1_server:key_1")
+        assert redis.type("sip2:server:key_1") == b"hash"
+        server = Server.find_server(server_name="server_sip2")
+        assert server == server_data
+        assert server.get_clients() == [client_data]
+
+        # a record stored under the prefix is newer than the legacy one
+        redis.set("server:key_1", jsonpickle.encode(dict(server_data, port=1)))
+        assert datastore.reindex([Server, Client]) == 2
+        assert not redis.exists("server:key_1")
+        assert Server.get_record_by_id("key_1") == server_data
+
+        datastore.flush()
+        assert not redis.keys("*:key_1")
+
+
+def test_write_behind_buffer(app, server_data, dummy_client_data):
+    """Test write-behind buffer of records."""
+    with app.app_context():
+        datastore = app.extensions["invenio-sip2"].datastore
+        server = Server.create(server_data, id_="key_1")
+        client = Client.create(dict(dummy_client_data), server=server)
+        buffer = WriteBehindBuffer(delay=60)
+        assert buffer.timeout() is None
+        client.write_behind = buffer
+
+        client.update({"terminal": "terminal_1"})
+        client.update({"institution_id": "institution"})
+        assert len(buffer) == 1
+        assert 0 < buffer.timeout() <= 60
+        assert not buffer.is_due()
+        assert "terminal" not in datastore.get(client.get_key())
+        with patch.object(
+            datastore, "update_many", wraps=datastore.update_many
+        ) as update_many:
+            buffer.flush()
+            update_many.assert_called_once_with([client])
+            buffer.flush()
+            update_many.assert_called_once()
+        stored = datastore.get(client.get_key())
+        assert stored["terminal"] == "terminal_1"
+        assert stored["institution_id"] == "institution"
+
+        # pending updates of deleted records are dropped
+        buffer.delay = 0
+        client.update({"terminal": "terminal_2"})
+        assert buffer.is_due()
+        client.delete()
+        assert not len(buffer)
+        server.delete()
+
+
+@requires_redis
+def test_server_cache(app, server_data):
+    """Test read-through cache of servers."""
+    with app.app_context():
+        ext = app.extensions["invenio-sip2"]
+        server = Server.create(server_data, id_="key_1")
+        with patch.object(
+            ext.datastore, "get", wraps=ext.datastore.get
+        ) as datastore_get:
+            assert Server.get_record_by_id(server.id) == server
+            assert Server.get_record_by_id(server.id) == server
+            datastore_get.assert_called_once()
+        assert Server.find_server(server_name=server_data["server_name"]) == server
+
+        # changes invalidate the cache
+        server.down()
+        assert Server.get_record_by_id(server.id)["status"] == "down"
+        assert (
+            Server.find_server(server_name=server_data["server_name"]).get("status")
+            == "down"
+        )
+
+        # changes published by another process invalidate the cache
+        # once the notifications of the previous changes are received
+        time.sleep(0.5)
+        Server.get_record_by_id(server.id)
+        assert server.get_key() in ext.server_cache
+        Sip2RedisDatastore(app).datastore.publish(
+            ext.datastore.channel, json.dumps([server.get_key()])
+        )
+        for _ in range(50):
+            if server.get_key() not in ext.server_cache:
+                break
+            time.sleep(0.1)
+        assert server.get_key() not in ext.server_cache
+
+        server.delete()
+        assert Server.get_record_by_id(server.id) is None
+        assert not Server.get_all_records()
+
+
+def test_in_memory_datastore(app, server_data, dummy_client_data, tmp_path):
+    """Test in-memory datastore."""
+    snapshot = tmp_path / "datastore.json"
+    ext = app.extensions["invenio-sip2"]
+    with patch.dict(app.config, {"SIP2_DATASTORE_MEMORY_SNAPSHOT": str(snapshot)}):
+        datastore = InMemoryDatastore(app)
+        restored = InMemoryDatastore(app)
+    with (
+        app.app_context(),
+        patch.object(ext, "datastore", datastore),
+        patch.object(ext, "server_cache", RecordCache(datastore)),
+    ):
+        server = Server.create(server_data, id_="key_1")
+        client = Client.create(dict(dummy_client_data), server=server)
+        assert Server.get_record_by_id(server.id) == server
+        assert Client.get_record_by_id(client.id) == client
+        assert server.get_clients() == [client]
+        assert datastore.search(
+            index_type="client", filter_query=f"terminal:{client.terminal}"
+        ) == [client]
+
+        # updates only write the changed fields and move the indexes
+        client.update({"terminal": "terminal_1"})
+        assert datastore.get(client.get_key())["terminal"] == "terminal_1"
+        assert datastore.search(
+            index_type="client", filter_query="terminal:terminal_1"
+        ) == [client]
+        assert not datastore.search(
+            index_type="client", filter_query="terminal:127.0.0.1"
+        )
+        # stored records are not shared with the returned ones
+        datastore.get(client.get_key())["terminal"] = "changed"
+        assert datastore.get(client.get_key())["terminal"] == "terminal_1"
+
+        datastore.snapshot()
+        restored.load_snapshot()
+        assert restored.get(client.get_key()) == client
+        assert restored.search(
+            index_type="client", filter_query=f"server:{server.id}"
+        ) == [client]
+
+        client.delete()
+        assert server.get_clients() == []
+        assert len(list(datastore.all())) == 1
+        datastore.flush()
+        assert not list(datastore.all())
+
+
+def test_sqlite_datastore(app, server_data, dummy_client_data, tmp_path):
+    """Test SQLite datastore."""
+    path = str(tmp_path / "datastore.db")
+    ext = app.extensions["invenio-sip2"]
+    with patch.dict(app.config, {"SIP2_DATASTORE_SQLITE_PATH": path}):
+        datastore = Sip2SQLiteDatastore(app)
+        reopened = Sip2SQLiteDatastore(app)
+    assert datastore.connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    with (
+        app.app_context(),
+        patch.object(ext, "datastore", datastore),
+        patch.object(ext, "server_cache", RecordCache(datastore)),
+    ):
+        server = Server.create(server_data, id_="key_1")
+        client = Client.create(dict(dummy_client_data), server=server)
+        assert Server.get_record_by_id(server.id) == server
+        assert Client.get_record_by_id(client.id) == client
+        assert server.get_clients() == [client]
+        assert datastore.get_many([client.get_key(), "missing"]) == [client, None]
+        assert Client.count() == 1
+        assert datastore.count() == 2
+
+        client.update({"terminal": "terminal_1"})
+        assert datastore.search(
+            index_type="client", filter_query="terminal:terminal_1"
+        ) == [client]
+        assert not datastore.search(
+            index_type="client", filter_query="terminal:127.0.0.1"
+        )
+        assert datastore.search(client.id, index_type="client") == [client]
+
+        # records persist across connections
+        assert reopened.get(client.get_key()) == client
+        assert reopened.reindex([Server, Client]) == 2
+
+        client.delete()
+        assert server.get_clients() == []
+        assert Client.count() == 0
+        datastore.flush()
+        assert not list(datastore.all())
+
+
+@requires_redis
+def test_redis_datastore_expiry(app, server_data, dummy_client_data):
+    """Test expiry of the records of running servers."""
+    with app.app_context():
+        datastore = app.extensions["invenio-sip2"].datastore
+        redis = datastore.datastore
+        server = Server.create(server_data, id_="key_1")
+        assert redis.ttl(f"sip2:{server.get_key()}") == -1
+        server.up()
+        assert 0 < redis.ttl(f"sip2:{server.get_key()}") <= datastore.record_ttl
+        client = Client.create(dict(dummy_client_data), server=server)
+        assert 0 < redis.ttl(f"sip2:{client.get_key()}") <= datastore.record_ttl
+
+        redis.expire(f"sip2:{client.get_key()}", 10)
+        datastore.touch([server, client])
+        assert redis.ttl(f"sip2:{client.get_key()}") > 10
+
+        # the index members are scored by the expiry time of the records
+        index_key = f"sip2:index:client:server:{server.id}"
+        assert redis.zscore(index_key, client.get_key()) > time.time()
+        assert redis.zscore("sip2:index:server:members", server.get_key()) > time.time()
+
+        # index members of expired records are pruned when counted or read
+        redis.delete(f"sip2:{client.get_key()}")
+        for key in ("sip2:index:client:members", index_key):
+            redis.zadd(key, {client.get_key(): time.time() - 1}, xx=True)
+        assert server.number_of_clients == 0
+        assert not redis.zcard(index_key)
+        assert Client.count() == 0
+        assert datastore.count() == 1
+        assert server.get_clients() == []
+        assert Client.get_all_records() == []
+        assert redis.hget("sip2:index:client", client.id) is None
+
+        server.down()
+        assert redis.ttl(f"sip2:{server.get_key()}") == -1
+        server.delete()
+
+
+@requires_redis
+def test_redis_datastore_prefix(app, server_data):
+    """Test redis keys are prefixed and flush keeps the other keys."""
+    with app.app_context():
+        datastore = app.extensions["invenio-sip2"].datastore
+        redis = datastore.datastore
+        redis.set("cache:shared", "value")
+        server = Server.create(server_data, id_="key_1")
+        assert redis.exists(f"sip2:{server.get_key()}")
+        assert not redis.exists(server.get_key())
+        assert all(key.startswith(b"sip2:") for key in redis.keys("*server*"))
+
+        datastore.flush()
+        assert not redis.keys("sip2:*")
+        assert redis.get("cache:shared") == b"value"
+        redis.delete("cache:shared")
+
+        # without prefix the keys are unchanged
+        with patch.dict(app.config, {"SIP2_DATASTORE_REDIS_PREFIX": ""}):
+            unprefixed = Sip2RedisDatastore(app)
+        unprefixed.add(server)
+        assert redis.exists(server.get_key())
+        assert unprefixed.get("key_1", "server") == server
+        unprefixed.flush()
+
+
+@requires_redis
+@pytest.mark.parametrize("hash_tags", [False, True])
+def test_redis_datastore_mutations(app, server_data, dummy_client_data, hash_tags):
+    """Test scripted and, on a cluster, plain command mutations."""
+    ext = app.extensions["invenio-sip2"]
+    with app.app_context():
+        datastore = Sip2RedisDatastore(app)
+        datastore.hash_tags = hash_tags
+        redis = datastore.datastore
+        redis.flushdb()
+        # the script is loaded when missing from the script cache
+        redis.script_flush()
+        with patch.object(ext, "datastore", datastore):
+            server = Server.create(server_data, id_="key_1")
+            client = Client.create(
+                dict(dummy_client_data, terminal="terminal_1"), server=server
+            )
+            assert redis.hget(f"sip2:{client.get_key()}", "_format") == b"json/1"
+            assert redis.ttl(f"sip2:{client.get_key()}") > 0
+            assert datastore.count("client", f"server:{server.id}") == 1
+
+            client["terminal"] = "terminal_2"
+            del client["ip_address"]
+            client.update({})
+            assert not redis.hexists(f"sip2:{client.get_key()}", "ip_address")
+            assert datastore.count("client", "terminal:terminal_1") == 0
+            assert datastore.count("client", "terminal:terminal_2") == 1
+            assert Client.get_record_by_id(client.id)["terminal"] == "terminal_2"
+
+            # a missing object is rewritten entirely, not as a fragment
+            redis.delete(f"sip2:{client.get_key()}")
+            client["terminal"] = "terminal_3"
+            client.update({})
+            assert Client.get_record_by_id(client.id) == client
+            assert redis.hget(f"sip2:{client.get_key()}", "_format") == b"json/1"
+            assert redis.ttl(f"sip2:{client.get_key()}") > 0
+            assert datastore.count("client", "terminal:terminal_2") == 0
+            assert datastore.count("client", "terminal:terminal_3") == 1
+
+            client.delete()
+            assert not redis.exists(f"sip2:{client.get_key()}")
+            assert datastore.count("client") == 0
+            assert datastore.count("client", "terminal:terminal_3") == 0
+            server.delete()
+            assert datastore.count() == 0
+
+
+@requires_redis
+def test_redis_datastore_failed_update(app, server_data, dummy_client_data):
+    """Test changes which failed to be written are written on next update."""
+    with app.app_context():
+        datastore = app.extensions["invenio-sip2"].datastore
+        server = Server.create(server_data, id_="key_1")
+        client = Client.create(dict(dummy_client_data), server=server)
+        with (
+            patch.object(datastore, "_execute", side_effect=RedisConnectionError),
+            pytest.raises(RedisConnectionError),
+        ):
+            client.update({"terminal": "terminal_1"})
+        client.update({})
+        assert Client.get_record_by_id(client.id)["terminal"] == "terminal_1"
+        assert datastore.count("client", "terminal:terminal_1") == 1
+        server.delete()
+
+
+def test_record_counts(app, server_data, dummy_client_data):
+    """Test record counts are read from the indexes."""
+    with app.app_context():
+        datastore = app.extensions["invenio-sip2"].datastore
+        datastore.flush()
+        server = Server.create(server_data, id_="key_1")
+        Client.create(dict(dummy_client_data), server=server)
+        Client.create(dict(dummy_client_data, socket=1234), server=server)
+        with (
+            # servers are listed from the server cache
+            patch.object(Monitoring, "get_servers", return_value=[server]),
+            patch.object(datastore, "all") as datastore_all,
+            patch.object(datastore, "search") as datastore_search,
+            patch.object(datastore, "get_many") as get_many,
+        ):
+            assert Server.count() == 1
+            assert Client.count() == 2
+            assert datastore.count() == 3
+            assert server.number_of_clients == 2
+            assert Monitoring.status()["servers_info"][server.id]["nb_client"] == 2
+            datastore_all.assert_not_called()
+            datastore_search.assert_not_called()
+            get_many.assert_not_called()
+        server.delete()
+        assert Client.count() == 0
+
+
+def test_clear_all_clients(app, server_data, dummy_client_data):
+    """Test clients of a server are deleted in a single batch."""
+    with app.app_context():
+        datastore = app.extensions["invenio-sip2"].datastore
+        datastore.flush()
+        server = Server.create(server_data, id_="key_1")
+        for number in range(20):
+            Client.create(
+                dict(dummy_client_data, socket=number, terminal="terminal_1"),
+                server=server,
+            )
+        assert server.number_of_clients == 20
+        with patch.object(datastore, "delete", wraps=datastore.delete) as delete:
+            server.clear_all_clients()
+            delete.assert_not_called()
+        assert server.number_of_clients == 0
+        assert Client.count() == 0
+        assert datastore.count("client", "terminal:terminal_1") == 0
+        assert Server.get_record_by_id(server.id)
+
+
+@requires_redis
+def test_redis_datastore_connection(app):
+    """Test redis connection pool options and retries."""
+    with app.app_context():
+        datastore = Sip2RedisDatastore(app)
+        pool = datastore.datastore.connection_pool
+        assert (
+            pool.max_connections == app.config["SIP2_DATASTORE_REDIS_MAX_CONNECTIONS"]
+        )
+        connection = pool.get_connection()
+        pool.release(connection)
+        assert connection.socket_timeout == 5
+        assert connection.health_check_interval == 30
+
+        # transient connection errors are retried
+        with (
+            patch(
+                "redis.connection.Connection.send_command",
+                side_effect=[RedisConnectionError("failover"), None],
+                autospec=True,
+            ) as send_command,
+            patch("redis.connection.Connection.read_response", return_value=b"PONG"),
+        ):
+            assert datastore.datastore.ping()
+            assert send_command.call_count == 2
+
+
+def test_redis_datastore_sentinel_and_cluster(app):
+    """Test redis sentinel and cluster connections and key hash tags."""
+    ext = app.extensions["invenio-sip2"]
+    config = {
+        "SIP2_DATASTORE_REDIS_URL": "redis://localhost:6379/2",
+        "SIP2_DATASTORE_REDIS_SENTINELS": [["sentinel", 26379]],
+    }
+    with (
+        app.app_context(),
+        patch.dict(app.config, config),
+        patch("redis.Sentinel.master_for") as master_for,
+    ):
+        datastore = Sip2RedisDatastore(app)
+        assert datastore.datastore == master_for.return_value
+        assert master_for.call_args.args == ("sip2",)
+        assert master_for.call_args.kwargs["db"] == 2
+        assert datastore.transaction
+
+    config = {"SIP2_DATASTORE_REDIS_CLUSTER": True}
+    with (
+        app.app_context(),
+        patch.dict(app.config, config),
+        patch("redis.RedisCluster.from_url") as from_url,
+    ):
+        datastore = Sip2RedisDatastore(app)
+        assert datastore.datastore == from_url.return_value
+        assert not datastore.transaction
+        with patch.object(ext, "datastore", datastore):
+            server_key = Server.build_key("server_1")
+            client_key = Client.build_key("client_1", server_id="server_1")
+        assert server_key == "server:{server_1}"
+        index_key = "index:client:server:{server_1}"
+        # a server, its clients and their index share the same slot
+        assert (
+            key_slot(server_key.encode())
+            == key_slot(client_key.encode())
+            == key_slot(index_key.encode())
+        )
+
+
+@requires_redis
+def test_async_redis_datastore(app, server_data, dummy_client_data):
+    """Test asynchronous redis datastore and records."""
+
+    async def run(server):
+        client = await Client.acreate(dict(dummy_client_data), server=server)
+        assert Client.get_record_by_id(client.id, server_id=server.id) == client
+        assert await Client.aget_record_by_id(client.id) == client
+        assert await server.aget_clients() == [client]
+        assert await Client.acount() == 1
+        assert await datastore.count("client", f"server:{server.id}") == 1
+
+        await client.aupdate({"terminal": "terminal_1"})
+        assert Client.get_record_by_id(client.id)["terminal"] == "terminal_1"
+        assert await datastore.search(
+            index_type="client", filter_query="terminal:terminal_1"
+        ) == [client]
+        assert await datastore.get_many([client.get_key(), "missing"]) == [
+            client,
+            None,
+        ]
+        assert len(await datastore.all()) == 2
+        await datastore.touch([client])
+
+        # expired records are not counted
+        await datastore.datastore.delete(f"sip2:{client.get_key()}")
+        for key in (
+            "sip2:index:client:members",
+            f"sip2:index:client:server:{server.id}",
+        ):
+            await datastore.datastore.zadd(key, {client.get_key(): time.time() - 1})
+        assert await Client.acount() == 0
+        assert await datastore.count("client", f"server:{server.id}") == 0
+
+        # a missing object is rewritten entirely
+        await client.aupdate({"terminal": "terminal_2"})
+        assert await Client.aget_record_by_id(client.id) == client
+        await client.adelete()
+        assert await Client.aget_all_records() == []
+        assert server.get_clients() == []
+        await datastore.close()
+
+    with app.app_context():
+        ext = app.extensions["invenio-sip2"]
+        datastore = Sip2AsyncRedisDatastore(app)
+        server = Server.create(server_data, id_="key_1")
+        with patch.dict(ext.__dict__, {"async_datastore": datastore}):
+            asyncio.run(run(server))
+        server.delete()
+
+
+@requires_redis
+def test_async_server(app, server_data):
+    """Test asynchronous servers only use the asynchronous datastore."""
+    ext = app.extensions["invenio-sip2"]
+
+    async def run():
+        server = await Server.acreate(dict(server_data), id_="key_1")
+        assert await Server.afind_server(server_name=server_data["server_name"])
+        Server.get_record_by_id(server.id)
+        assert server.get_key() in ext.server_cache
+        await server.aupdate({"status": "running"})
+        assert server.get_key() not in ext.server_cache
+        with pytest.raises(ServerAlreadyRunning):
+            await Server.acreate(dict(server_data))
+
+        assert server.acquire_lease("owner_1")
+        await server.adelete()
+        assert await Server.aget_record_by_id(server.id) is None
+        await ext.async_datastore.close()
+
+    with app.app_context(), patch.dict(ext.__dict__):
+        ext.__dict__.pop("async_datastore", None)
+        # the asynchronous datastore is derived from the datastore
+        assert isinstance(ext.async_datastore, Sip2AsyncRedisDatastore)
+        with (
+            patch.object(ext.datastore, "release_lease") as release_lease,
+            patch.object(ext.datastore, "publish") as publish,
+            patch.object(ext.datastore, "search") as search,
+        ):
+            asyncio.run(run())
+        release_lease.assert_not_called()
+        publish.assert_not_called()
+        search.assert_not_called()
+        # the lease is released
+        assert ext.datastore.acquire_lease(Server.build_key("key_1"), "owner_2", 60)
+        ext.datastore.release_lease(Server.build_key("key_1"), "owner_2")
+
+    with (
+        app.app_context(),
+        patch.dict(ext.__dict__, {"datastore": InMemoryDatastore(app)}),
+    ):
+        ext.__dict__.pop("async_datastore", None)
+        with pytest.raises(RuntimeError):
+            assert ext.async_datastore
+
+
+def test_transaction_journal(app):
+    """Test transaction journal buffer and retention."""
+    with app.app_context():
+        datastore = app.extensions["invenio-sip2"].datastore
+        journal = TransactionJournal(maxlen=3, delay=60)
+        assert journal.timeout() is None
+        for number in range(5):
+            journal.add({"command": "63", "request": f"request_{number}"})
+        assert len(journal) == 5
+        assert not journal.is_due()
+        assert datastore.read_journal() == []
+
+        journal.flush()
+        assert not len(journal)
+        entries = datastore.read_journal()
+        if "Redis" not in type(datastore).__name__:
+            # redis trims the stream approximately
+            assert [entry["request"] for _, entry in entries] == [
+                "request_2",
+                "request_3",
+                "request_4",
+            ]
+        last_id, last_entry = entries[-1]
+        assert last_entry == {"command": "63", "request": "request_4"}
+        assert datastore.read_journal(after=last_id) == []
+        first_id, _ = entries[0]
+        assert len(datastore.read_journal(after=first_id, count=1)) == 1
+
+        # journal failures never reach the server loop
+        journal.add({"command": "63"})
+        with patch.object(datastore, "append_journal", side_effect=OSError):
+            journal.flush()
+        assert not len(journal)
@@ -40,3 +40,34 @@ def test_init():
     assert "invenio-sip2" not in app.extensions
     ext.init_app(app)
     assert "invenio-sip2" in app.extensions
+
+
+def test_init_server_cache(tmp_path):
+    """Test servers are not cached if other processes aren't notified."""
+    app = Flask("testapp", instance_path=str(tmp_path))
+    app.config["SIP2_DATASTORE_HANDLER"] = "invenio_sip2.datastore:Sip2SQLiteDatastore"
+    ext = InvenioSIP2(app)
+    assert ext.server_cache.ttl == 0
+
+
+def test_supported_messages(app):
+    """Test supported messages field computed from handler config."""
+    ext = app.extensions["invenio-sip2"]
+    supported_messages = ext.supported_messages("test_ils")
+    assert isinstance(supported_messages, str)
+    assert len(supported_messages) == 16
+    assert ext.supported_messages("test_invalid") == "NNNNNYYNYNNNNNNN"
+
+    handlers_config = app.config["SIP2_REMOTE_ACTION_HANDLERS"]
+    ext.reload_handlers(app)
+    assert ext.supported_messages("test_ils") == supported_messages
+    app.config["SIP2_REMOTE_ACTION_HANDLERS"] = {
+        "test_ils": {"login_handler": handlers_config["test_ils"]["login_handler"]}
+    }
+    try:
+        ext.reload_handlers(app)
+        assert ext.supported_messages("test_ils") == "NNNNNYYNYNNNNNNN"
+        assert "test_invalid" not in ext.sip2_handlers.supported_messages
+    finally:
+        app.config["SIP2_REMOTE_ACTION_HANDLERS"] = handlers_config
+        ext.reload_handlers(app)
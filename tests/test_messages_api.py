@@ -20,6 +20,7 @@ import pytest
 
 from invenio_sip2.api import Message
 from invenio_sip2.errors import CommandNotFound, UnknownFieldIdMessageError
+from invenio_sip2.proxies import current_sip2
 
 
 def test_messages_api_not_found(app):
@@ -55,3 +56,37 @@ def test_messages_api(app, patron_information_message):
     # test unknown message field
     with pytest.raises(UnknownFieldIdMessageError):
         message.get_field_values("message_type")
+
+
+def test_messages_api_dumps_raw(app, patron_information_message):
+    """Test compact dumps of a message."""
+    message = Message(request=patron_information_message)
+    for compress in (False, True):
+        data = message.dumps_raw(compress=compress)
+        assert data["command"] == "63"
+        assert data["sequence_number"] == message.sequence_number
+        assert data["date"]
+        assert ("_sip2_zlib" in data) is compress
+        assert Message.loads(data).dumps() == message.dumps()
+    assert Message.loads(None) is None
+
+
+def test_messages_api_masked_text(app, patron_information_message):
+    """Test passwords and personal data are masked."""
+    request = Message(request=patron_information_message)
+    assert "ADpatron_pwd|" in str(request)
+    assert "AD***|" in request.masked_text()
+    assert "AApatron_identifier|" in request.masked_text()
+
+    response = Message(
+        message_type=current_sip2.sip2_message_types.get_by_command("64")
+    )
+    response.add_variable_field("patron_id", "patron_identifier")
+    response.add_variable_field("patron_name", "Jane Doe")
+    response.add_variable_field("email", "jane@example.org")
+    response.add_variable_fields("charged_items", ["item_1", "item_2"])
+    masked = response.masked_text()
+    for value in ("Jane Doe", "jane@example.org", "item_1", "item_2"):
+        assert value not in masked
+    assert "AApatron_identifier|" in masked
+    assert masked.count("AU***|") == 2
@@ -17,11 +17,17 @@
 """Server test."""
 
 import socket
-from unittest.mock import MagicMock
+import time
+from unittest.mock import MagicMock, patch
 
 import pytest
 
-from invenio_sip2.server import SocketEventListener
+from invenio_sip2.api import Message
+from invenio_sip2.datastore import Sip2RedisDatastore
+from invenio_sip2.errors import ServerAlreadyRunning, ServerLeaseLost
+from invenio_sip2.proxies import current_datastore
+from invenio_sip2.records import Client, Server, WriteBehindBuffer
+from invenio_sip2.server import SocketEventListener, SocketServer
 
 
 def test_set_selector_events_mask_invalid_mode():
@@ -43,3 +49,155 @@ def test_socket_server(app, dummy_socket_server, selfckeck_login_message):
         client.settimeout(1)
         client.sendall(selfckeck_login_message)
         client.close()
+
+
+def test_socket_server_heartbeat(app):
+    """Test heartbeat refreshing the expiry of the server records."""
+    with app.app_context():
+        server = object.__new__(SocketServer)
+        server.server = MagicMock()
+        server.write_behind = None
+        server.journal = None
+        server.heartbeat_interval = 60
+        server.next_heartbeat = None
+        assert server.timeout() is None
+
+        client = MagicMock()
+        server.selector = MagicMock()
+        server.selector.get_map.return_value = {
+            1: MagicMock(data=None),
+            2: MagicMock(data=MagicMock(client=client)),
+        }
+        with patch.object(app.extensions["invenio-sip2"], "datastore") as datastore:
+            server.heartbeat()
+            datastore.touch.assert_called_once_with([server.server, client])
+        server.server.update.assert_called_once_with(server.server)
+        assert 59 < server.timeout() <= 60
+
+        # a lease taken over is neither written back nor refreshed
+        server.server.reset_mock()
+        server.server.acquire_lease.return_value = False
+        with (
+            patch.object(app.extensions["invenio-sip2"], "datastore") as datastore,
+            pytest.raises(ServerLeaseLost),
+        ):
+            server.heartbeat()
+        server.server.update.assert_not_called()
+        datastore.touch.assert_not_called()
+
+
+def test_socket_server_run_lease_lost(app):
+    """Test a server stops serving when its lease is taken over."""
+    with app.app_context():
+        server = object.__new__(SocketServer)
+        server.server = MagicMock()
+        server.server.acquire_lease.return_value = False
+        server.write_behind = None
+        server.journal = None
+        server.heartbeat_interval = 0.01
+        server.next_heartbeat = None
+        listener = MagicMock(data=None)
+        message = MagicMock()
+        server.selector = MagicMock()
+        server.selector.select.return_value = []
+        server.selector.get_map.return_value = {1: listener, 2: message}
+        with patch.object(app.extensions["invenio-sip2"], "datastore") as datastore:
+            server.run()
+        datastore.touch.assert_not_called()
+        message.data.close.assert_called_once()
+        listener.fileobj.close.assert_called_once()
+        server.selector.close.assert_called_once()
+        server.server.update.assert_not_called()
+        server.server.down.assert_not_called()
+
+
+def test_socket_server_run_lease_taken(app):
+    """Test a server leased by another process is never closed."""
+    with app.app_context():
+        server = object.__new__(SocketServer)
+        server.server = MagicMock()
+        server.server.up.side_effect = ServerAlreadyRunning("key_1")
+        server.selector = MagicMock()
+        with pytest.raises(ServerAlreadyRunning):
+            server.run()
+        server.server.down.assert_not_called()
+        server.selector.close.assert_not_called()
+
+
+def test_socket_server_datastore_down(app, server_data, dummy_client_data, caplog):
+    """Test the server survives a datastore down beyond the retries."""
+    config = {
+        "SIP2_DATASTORE_REDIS_URL": "redis://localhost:1/0",
+        "SIP2_DATASTORE_REDIS_RETRIES": 2,
+        "SIP2_DATASTORE_REDIS_RETRY_BACKOFF": (0.01, 0.01),
+    }
+    with app.app_context():
+        server = object.__new__(SocketServer)
+        server.host, server.port = server_data["host"], server_data["port"]
+        server.server = Server.create(server_data, id_="key_1")
+        server.server.up()
+        server.journal = None
+        server.heartbeat_interval = 0.01
+        server.write_behind = WriteBehindBuffer()
+        client = Client.create(dict(dummy_client_data), server=server.server)
+        client.write_behind = server.write_behind
+        client.update({"authenticated": True, "institution_id": "inst"})
+
+        message = MagicMock()
+        message.process_events.side_effect = lambda mask: current_datastore.get(
+            client.get_key()
+        )
+        events = [[(MagicMock(data=message), 1)]] * 3 + [OSError("closed")]
+
+        def select(timeout):
+            time.sleep(0.02)
+            event = events.pop(0)
+            if isinstance(event, Exception):
+                raise event
+            return event
+
+        server.selector = MagicMock()
+        server.selector.select.side_effect = select
+        server.selector.get_map.return_value = {}
+        with (
+            patch.dict(app.config, config),
+            patch.object(
+                app.extensions["invenio-sip2"], "datastore", Sip2RedisDatastore(app)
+            ),
+            patch.object(Server, "up"),
+        ):
+            server.run()
+        # each connection is closed, the updates are kept and retried
+        assert message.close.call_count == 3
+        assert len(server.write_behind) == 1
+        assert "heartbeat of server key_1 failed" in caplog.text
+        assert "write-behind flush failed" in caplog.text
+
+        server.write_behind.flush()
+        assert len(server.write_behind) == 0
+        stored = Client.get_record_by_id(client.id)
+        assert stored["authenticated"] is True
+        assert stored["institution_id"] == "inst"
+        assert Server.get_record_by_id(server.server.id).is_running
+        assert server.server.down()
+
+
+def test_socket_event_listener_journal_error(app, patron_information_message):
+    """Test a failed transaction is journaled without the previous response."""
+    with app.app_context():
+        listener = object.__new__(SocketEventListener)
+        listener.server = MagicMock(id="server_1")
+        listener.client = MagicMock(id="client_1", terminal="terminal_1")
+        listener.journal = MagicMock()
+        listener.request = Message(request=patron_information_message)
+        listener.response = Message(request=patron_information_message)
+        sip2 = app.extensions["invenio-sip2"].sip2
+        with (
+            patch.object(sip2, "execute", side_effect=ValueError),
+            pytest.raises(ValueError),
+        ):
+            listener.process_request()
+        entry = listener.journal.add.call_args.args[0]
+        assert entry["outcome"] == "error"
+        assert entry["response"] == ""
+        assert "AD***|" in entry["request"]